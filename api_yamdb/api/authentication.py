@@ -0,0 +1,105 @@
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+ROLE_CLAIM = 'role'
+SUPERUSER_CLAIM = 'is_superuser'
+
+
+def get_access_token(user):
+    """Access-токен, в claims которого записаны роль и is_superuser."""
+
+    token = AccessToken.for_user(user)
+    token[ROLE_CLAIM] = user.role
+    token[SUPERUSER_CLAIM] = user.is_superuser
+    return token
+
+
+class TokenClaimsUser:
+    """Пользователь, собранный из claims токена.
+
+    Права проверяются по роли из токена без запроса к базе. Остальные
+    атрибуты берутся из записи User, которая загружается при первом
+    обращении к ним; после загрузки роль и is_superuser берутся из неё.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+
+    def __init__(self, token):
+        self.token = token
+        self.pk = self.id = token[api_settings.USER_ID_CLAIM]
+        self.role = token[ROLE_CLAIM]
+        self.is_superuser = token[SUPERUSER_CLAIM]
+
+    @cached_property
+    def instance(self):
+        try:
+            user = User.objects.get(pk=self.pk)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        self.role = user.role
+        self.is_superuser = user.is_superuser
+        return user
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in ('token', 'pk'):
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, (User, TokenClaimsUser))
+            and self.pk == other.pk
+        )
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return str(self.instance)
+
+
+def resolve_user(user):
+    """Запись User для пользователя запроса (загружает её из токена)."""
+
+    if isinstance(user, TokenClaimsUser):
+        return user.instance
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без SELECT пользователя на чтение.
+
+    Для GET, HEAD и OPTIONS публичного каталога роль, записанная в токен,
+    действует до истечения его срока. Запросы на запись и так обращаются
+    к базе, поэтому для них пользователь загружается сразу: удалённый или
+    неактивный пользователь получает 401, а права проверяются по текущей
+    роли. Эндпоинты только для админа загружают пользователя и на чтение
+    (см. IsAdmin). Токены без роли в claims обрабатываются как
+    в JWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and request.method not in SAFE_METHODS:
+            resolve_user(result[0])
+        return result
+
+    def get_user(self, validated_token):
+        if (
+            ROLE_CLAIM not in validated_token
+            or SUPERUSER_CLAIM not in validated_token
+        ):
+            return super().get_user(validated_token)
+        return TokenClaimsUser(validated_token)
@@ -0,0 +1,118 @@
+import re
+import threading
+from bisect import bisect_left, insort
+
+from reviews.models import Title
+
+
+def normalize(text):
+    """Приводит строку к виду для сравнения: регистр, ё/е, пробелы."""
+
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+class TitleNameIndex:
+    """Префиксный индекс названий произведений в памяти процесса.
+
+    Для каждого названия хранятся ключи, начинающиеся с каждого его
+    слова, в отсортированном списке, поэтому поиск по префиксу - это
+    bisect и короткий проход вперёд. Совпадения с начала названия
+    идут раньше совпадений с начала внутреннего слова. Индекс строится
+    одним запросом при первом обращении и обновляется сигналами Title.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = None
+        self._keys = {}
+        self._name_keys = []
+        self._word_keys = []
+
+    @staticmethod
+    def get_keys(name):
+        normalized = normalize(name)
+        return normalized, [
+            normalized[match.start():]
+            for match in re.finditer(r'\w+', normalized)
+            if match.start()
+        ]
+
+    def _ensure_built(self):
+        if self._names is None:
+            self.build(Title.objects.values_list('id', 'name'))
+
+    def build(self, rows):
+        names, keys, name_keys, word_keys = {}, {}, [], []
+        for title_id, name in rows:
+            names[title_id] = name
+            keys[title_id] = self.get_keys(name)
+            name_keys.append((keys[title_id][0], title_id))
+            word_keys.extend((key, title_id) for key in keys[title_id][1])
+        name_keys.sort()
+        word_keys.sort()
+        with self._lock:
+            self._names, self._keys = names, keys
+            self._name_keys, self._word_keys = name_keys, word_keys
+
+    def reset(self):
+        with self._lock:
+            self._names = None
+            self._keys = {}
+            self._name_keys = []
+            self._word_keys = []
+
+    def add(self, title_id, name):
+        with self._lock:
+            if self._names is None:
+                return
+            self._remove(title_id)
+            self._names[title_id] = name
+            self._keys[title_id] = self.get_keys(name)
+            name_key, word_keys = self._keys[title_id]
+            insort(self._name_keys, (name_key, title_id))
+            for key in word_keys:
+                insort(self._word_keys, (key, title_id))
+
+    def remove(self, title_id):
+        with self._lock:
+            if self._names is not None:
+                self._remove(title_id)
+
+    def _remove(self, title_id):
+        if title_id not in self._keys:
+            return
+        name_key, word_keys = self._keys.pop(title_id)
+        del self._names[title_id]
+        for entries, key in (
+            (self._name_keys, name_key),
+            *((self._word_keys, key) for key in word_keys),
+        ):
+            position = bisect_left(entries, (key, title_id))
+            if (
+                position < len(entries)
+                and entries[position] == (key, title_id)
+            ):
+                del entries[position]
+
+    def search(self, prefix, limit=10):
+        """До limit пар (id, name), название которых содержит слово,
+        начинающееся с prefix."""
+
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+        self._ensure_built()
+        found = {}
+        with self._lock:
+            for entries in (self._name_keys, self._word_keys):
+                position = bisect_left(entries, (prefix,))
+                while position < len(entries) and len(found) < limit:
+                    key, title_id = entries[position]
+                    if not key.startswith(prefix):
+                        break
+                    found.setdefault(title_id, self._names[title_id])
+                    position += 1
+        return list(found.items())
+
+
+title_index = TitleNameIndex()
@@ -0,0 +1,260 @@
+from django.db import connection, transaction
+from django.db.models import Max
+from rest_framework import status
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.ratings import rebuild_ratings
+
+from .autocomplete import title_index
+from .cache import invalidate
+from .serializers import ReviewBulkSerializer, TitleBulkSerializer
+
+TITLE_FIELDS = ('name', 'year', 'description', 'category')
+
+
+def error(index, errors):
+    return {
+        'index': index,
+        'status': status.HTTP_400_BAD_REQUEST,
+        'errors': errors,
+    }
+
+
+def validate_items(items, serializer_class=TitleBulkSerializer):
+    """Проверяет элементы по отдельности, без запросов к базе."""
+
+    valid, results = [], {}
+    for index, item in enumerate(items):
+        serializer = serializer_class(
+            data=item, partial=isinstance(item, dict) and 'id' in item
+        )
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = error(index, serializer.errors)
+    return valid, results
+
+
+def get_item_errors(data, existing, categories, genres, updating):
+    errors = {}
+    if 'id' in data and data['id'] not in existing:
+        errors['id'] = [f'Произведение с id={data["id"]} не найдено.']
+    elif 'id' in data and data['id'] in updating:
+        errors['id'] = [
+            f'Произведение с id={data["id"]} уже обновляется в этом пакете.'
+        ]
+    if 'category' in data and data['category'] not in categories:
+        errors['category'] = [f'Категория {data["category"]} не найдена.']
+    missing = sorted(set(data.get('genre', ())) - genres.keys())
+    if missing:
+        errors['genre'] = [f'Жанры не найдены: {", ".join(missing)}.']
+    return errors
+
+
+def resolve_items(valid, results):
+    """Загружает категории, жанры и обновляемые произведения одним
+    запросом на модель и собирает объекты Title.
+
+    Повтор id в пакете - ошибка элемента: обновляется только первый.
+    """
+
+    categories = Category.objects.in_bulk(
+        {data['category'] for _, data in valid if 'category' in data},
+        field_name='slug',
+    )
+    genres = Genre.objects.in_bulk(
+        {slug for _, data in valid for slug in data.get('genre', ())},
+        field_name='slug',
+    )
+    existing = Title.objects.in_bulk(
+        {data['id'] for _, data in valid if 'id' in data}
+    )
+    created, updated, title_genres = [], [], {}
+    updating = set()
+    for index, data in valid:
+        errors = get_item_errors(data, existing, categories, genres, updating)
+        if errors:
+            results[index] = error(index, errors)
+            continue
+        if 'category' in data:
+            data['category'] = categories[data['category']]
+        fields = {
+            field: data[field] for field in TITLE_FIELDS if field in data
+        }
+        if 'id' in data:
+            title = existing[data['id']]
+            for field, value in fields.items():
+                setattr(title, field, value)
+            updated.append((index, title))
+            updating.add(title.pk)
+        else:
+            created.append((index, Title(**fields)))
+        if 'genre' in data:
+            title_genres[index] = {genres[slug] for slug in data['genre']}
+    return created, updated, title_genres
+
+
+@transaction.atomic
+def write_titles(created, updated, title_genres):
+    """Записывает произведения и связи с жанрами.
+
+    Новые произведения вставляются одним bulk_create, если СУБД
+    возвращает id вставленных строк, иначе по одному INSERT.
+    """
+
+    new_titles = [title for _, title in created]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Title.objects.bulk_create(new_titles)
+    else:
+        for title in new_titles:
+            title.save()
+    if updated:
+        Title.objects.bulk_update(
+            [title for _, title in updated], TITLE_FIELDS
+        )
+    titles = dict(created + updated)
+    through = Title.genre.through
+    through.objects.filter(title_id__in=[
+        titles[index].pk for index, _ in updated if index in title_genres
+    ]).delete()
+    through.objects.bulk_create(
+        through(title_id=titles[index].pk, genre_id=genre.pk)
+        for index, item_genres in title_genres.items()
+        for genre in item_genres
+    )
+    # bulk_create, bulk_update и связи с жанрами не отправляют сигналов.
+    invalidate('title')
+
+    def update_index():
+        for title in titles.values():
+            title_index.add(title.pk, title.name)
+    transaction.on_commit(update_index)
+
+
+def save_titles(items):
+    """Создаёт и обновляет произведения пакетом.
+
+    Элементы с id обновляют произведения, остальные создаются.
+    Возвращает результат для каждого элемента в исходном порядке:
+    статус и id или ошибки.
+    """
+
+    valid, results = validate_items(items)
+    created, updated, title_genres = resolve_items(valid, results)
+    write_titles(created, updated, title_genres)
+    for index, title in created:
+        results[index] = {
+            'index': index, 'status': status.HTTP_201_CREATED, 'id': title.pk
+        }
+    for index, title in updated:
+        results[index] = {
+            'index': index, 'status': status.HTTP_200_OK, 'id': title.pk
+        }
+    return [results[index] for index in sorted(results)]
+
+
+def resolve_reviews(valid, results):
+    """Проверяет произведения, авторов и unique_review для всего пакета
+    тремя запросами и собирает объекты Review."""
+
+    titles = set(Title.objects.filter(
+        pk__in={data['title'] for _, data in valid}
+    ).values_list('pk', flat=True))
+    authors = User.objects.in_bulk(
+        {data['author'] for _, data in valid}, field_name='username'
+    )
+    # Пары из произведений и авторов пакета - надмножество нужных,
+    # точная проверка - по множеству пар.
+    taken = set(Review.objects.filter(
+        title_id__in=titles,
+        author_id__in=[author.pk for author in authors.values()],
+    ).values_list('title_id', 'author_id'))
+    reviews = []
+    for index, data in valid:
+        errors = {}
+        if data['title'] not in titles:
+            errors['title'] = [
+                f'Произведение с id={data["title"]} не найдено.'
+            ]
+        if data['author'] not in authors:
+            errors['author'] = [f'Пользователь {data["author"]} не найден.']
+        if errors:
+            results[index] = error(index, errors)
+            continue
+        pair = (data['title'], authors[data['author']].pk)
+        if pair in taken:
+            results[index] = error(index, {'non_field_errors': [
+                'Нельзя создавать несколько отзывов на произведение'
+            ]})
+            continue
+        taken.add(pair)
+        reviews.append((index, Review(
+            title_id=pair[0], author_id=pair[1],
+            text=data['text'], score=data['score'],
+        )))
+    return reviews
+
+
+def get_inserted(reviews, watermark):
+    """Индексы отзывов пакета, которые действительно записаны.
+
+    bulk_create(ignore_conflicts=True) не сообщает, какие строки
+    пропущены, поэтому записанной считается пара (произведение, автор),
+    у которой в базе строка с id больше watermark (наибольшего id
+    отзыва перед вставкой) и с текстом и оценкой из пакета. Отзыв,
+    записанный параллельно до взятия watermark, так не примется
+    за свой. Остаётся узкое окно между watermark и вставкой: параллельный
+    отзыв той же пары с тем же текстом и оценкой, закоммиченный в нём,
+    будет засчитан как вставленный.
+    """
+
+    stored = {
+        (title_id, author_id): (text, score)
+        for title_id, author_id, text, score in Review.objects.filter(
+            pk__gt=watermark,
+            title_id__in={review.title_id for _, review in reviews},
+            author_id__in={review.author_id for _, review in reviews},
+        ).values_list('title_id', 'author_id', 'text', 'score')
+    }
+    return {
+        index for index, review in reviews
+        if stored.get((review.title_id, review.author_id))
+        == (review.text, review.score)
+    }
+
+
+def save_reviews(items):
+    """Импортирует отзывы пакетом.
+
+    Вставка - один bulk_create(ignore_conflicts=True): отзыв,
+    появившийся параллельно, пропускается, а не ломает пакет, и для
+    такого элемента возвращается ошибка. Рейтинги затронутых
+    произведений пересчитываются по таблице отзывов один раз на пакет,
+    поэтому учитывают только действительно вставленные строки.
+    """
+
+    valid, results = validate_items(items, ReviewBulkSerializer)
+    reviews = resolve_reviews(valid, results)
+    with transaction.atomic():
+        watermark = Review.objects.aggregate(
+            max_id=Max('pk')
+        )['max_id'] or 0
+        Review.objects.bulk_create(
+            [review for _, review in reviews], ignore_conflicts=True
+        )
+        inserted = get_inserted(reviews, watermark)
+        rebuild_ratings(Title.objects.filter(
+            pk__in={review.title_id for _, review in reviews}
+        ))
+        invalidate('review')
+    for index, review in reviews:
+        if index not in inserted:
+            results[index] = error(index, {'non_field_errors': [
+                'Нельзя создавать несколько отзывов на произведение'
+            ]})
+            continue
+        results[index] = {
+            'index': index,
+            'status': status.HTTP_201_CREATED,
+            'title': review.title_id,
+        }
+    return [results[index] for index in sorted(results)]
@@ -0,0 +1,127 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+def get_response_cache():
+    return caches[settings.API_RESPONSE_CACHE_ALIAS]
+
+
+def get_generation(namespace):
+    """Текущее поколение данных пространства имён (например, 'title').
+
+    Поколение - метка времени, а не счётчик: после вытеснения ключа
+    из кэша новое значение не совпадёт ни с одним из прежних.
+    """
+
+    cache = get_response_cache()
+    key = f'generation:{namespace}'
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate(*namespaces):
+    """Сбрасывает закэшированные ответы после коммита транзакции."""
+
+    def bump():
+        get_response_cache().set_many(
+            {f'generation:{namespace}': time.time_ns()
+             for namespace in namespaces},
+            None,
+        )
+    transaction.on_commit(bump)
+
+
+def make_etag(data):
+    return quote_etag(hashlib.md5(JSONRenderer().render(data)).hexdigest())
+
+
+class CachedResponseMixin:
+    """Кэш ответов GET для редко меняющихся данных.
+
+    Ключ строится из пути, строки запроса, версии API и поколений
+    cache_namespaces, которые сбрасываются сигналами моделей
+    (api/signals.py). По совпадению If-None-Match возвращается 304
+    без обращения к базе и без рендеринга тела.
+    """
+
+    cache_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_response_cache_key(self, request):
+        generations = ':'.join(
+            str(get_generation(namespace))
+            for namespace in self.cache_namespaces
+        )
+        query = sorted(request.query_params.lists())
+        digest = hashlib.md5(
+            f'{request.version}|{request.path}|{query}'.encode()
+        ).hexdigest()
+        return f'response:{self.basename}:{generations}:{digest}'
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        cache = get_response_cache()
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (make_etag(response.data), response.data)
+            cache.set(key, cached)
+        etag, data = cached
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        return Response(data, headers={'ETag': etag})
+
+
+class ConditionalListMixin:
+    """Conditional GET для списка по хранимым версиям.
+
+    Отпечаток строится из get_fingerprint_parts() - полей родителя,
+    которые меняются вместе со списком (счётчик версий, данные, попадающие
+    в каждую строку), - и поколения 'user': имя автора тоже выводится
+    в каждой строке. Родитель загружается по первичному ключу, так что
+    отпечаток не зависит от размера списка. Если клиент прислал
+    совпадающий If-None-Match, основной запрос и сериализатор
+    не выполняются. Last-Modified не отправляется: по дате изменения
+    нельзя заметить удаление и запись в ту же секунду.
+    """
+
+    def get_fingerprint_parts(self):
+        raise NotImplementedError
+
+    def get_fingerprint(self, request):
+        parts = (
+            *self.get_fingerprint_parts(),
+            get_generation('user'),
+            request.get_full_path(),
+        )
+        return quote_etag(hashlib.md5(
+            '|'.join(map(str, parts)).encode()
+        ).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_fingerprint(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
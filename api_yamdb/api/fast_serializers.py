@@ -0,0 +1,127 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import relations, serializers
+
+# Поля, у которых to_representation сводится к приведению типа.
+CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.FloatField.to_representation: float,
+    serializers.ReadOnlyField.to_representation: None,
+}
+
+_plans = {}
+
+
+def get_model_getter(serializer, field):
+    """attrgetter для поля модели или None, если источник сложнее.
+
+    Field.get_attribute ещё вызывает callable-атрибуты и обрабатывает
+    словари, поэтому напрямую читаются только поля и связи модели.
+    """
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None or len(field.source_attrs) != 1:
+        return None
+    if isinstance(field, relations.ManyRelatedField) or (
+        isinstance(field, relations.RelatedField)
+        and not isinstance(field, relations.SlugRelatedField)
+    ):
+        # Свой get_attribute: .all() для связей, pk без загрузки объекта.
+        return None
+    try:
+        model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    return attrgetter(field.source_attrs[0])
+
+
+def plan_field(serializer, field):
+    getter = get_model_getter(serializer, field)
+    if isinstance(field, serializers.ListSerializer):
+        return field.field_name, getter, 'many', get_plan(field.child)
+    if isinstance(field, serializers.BaseSerializer):
+        return field.field_name, getter, 'nested', get_plan(field)
+    method = type(field).to_representation
+    if method is relations.SlugRelatedField.to_representation:
+        return field.field_name, getter, 'slug', attrgetter(field.slug_field)
+    if method in CONVERTERS:
+        return field.field_name, getter, 'convert', CONVERTERS[method]
+    return field.field_name, getter, 'field', None
+
+
+def get_plan(serializer):
+    """План чтения полей, общий для всех экземпляров класса
+    сериализатора."""
+
+    serializer_class = type(serializer)
+    if serializer_class not in _plans:
+        _plans[serializer_class] = tuple(
+            plan_field(serializer, field)
+            for field in serializer._readable_fields
+        )
+    return _plans[serializer_class]
+
+
+def identity(value):
+    return value
+
+
+def represent_many(represent):
+    def convert(data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        return [represent(item) for item in data]
+    return convert
+
+
+def compile_serializer(serializer):
+    """Функция instance -> dict с тем же результатом, что
+    serializer.to_representation.
+
+    Для полей модели значение читается attrgetter, а приведение типа
+    и вложенные сериализаторы разворачиваются заранее; остальные поля
+    идут через свои get_attribute и to_representation.
+    """
+
+    steps = []
+    fields = serializer.fields
+    for name, getter, kind, extra in get_plan(serializer):
+        field = fields[name]
+        if kind == 'many':
+            convert = represent_many(compile_serializer(field.child))
+        elif kind == 'nested':
+            convert = compile_serializer(field)
+        elif kind in ('slug', 'convert'):
+            convert = extra or identity
+        else:
+            convert = field.to_representation
+        steps.append((name, getter or field.get_attribute, convert))
+
+    def represent(instance):
+        ret = {}
+        for name, getter, convert in steps:
+            value = getter(instance)
+            ret[name] = None if value is None else convert(value)
+        return ret
+    return represent
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """ListSerializer с заранее скомпилированным чтением полей.
+
+    Используется только для вывода списков (many=True); запись идёт
+    обычным путём. Результат совпадает с ListSerializer, JSON - побайтно.
+    Отключается настройкой API_FAST_SERIALIZERS = False.
+    """
+
+    def to_representation(self, data):
+        if not settings.API_FAST_SERIALIZERS:
+            return super().to_representation(data)
+        represent = compile_serializer(self.child)
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        return [represent(item) for item in data]
@@ -1,6 +1,12 @@
 from django_filters import rest_framework
+from rest_framework import filters
 
 from reviews.models import Title
+from reviews.search import full_text_search
+
+
+class CharInFilter(rest_framework.BaseInFilter, rest_framework.CharFilter):
+    """Список строк через запятую: ?category__in=movie,book."""
 
 
 class TitlesFilter(rest_framework.FilterSet):
@@ -9,8 +15,81 @@ class TitlesFilter(rest_framework.FilterSet):
     category = rest_framework.CharFilter(
         field_name="category__slug",
     )
-    genre = rest_framework.CharFilter(field_name="genre__slug",)
+    category__in = CharInFilter(field_name='category__slug')
+    year__gte = rest_framework.NumberFilter(
+        field_name='year', lookup_expr='gte'
+    )
+    year__lte = rest_framework.NumberFilter(
+        field_name='year', lookup_expr='lte'
+    )
+    rating__gte = rest_framework.NumberFilter(
+        field_name='rating', lookup_expr='gte'
+    )
+    genre = rest_framework.CharFilter(method='filter_genre')
+    genre_match = rest_framework.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')),
+        method='skip_filter',
+    )
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'category', 'genre',)
+
+    def filter_genre(self, queryset, name, value):
+        """?genre=drama,comedy: полусоединение вместо JOIN по жанрам.
+
+        Подзапрос title_id IN (...) идёт от индекса по genre_id и не
+        размножает строки произведений, поэтому не нужен DISTINCT.
+        С genre_match=all нужны все перечисленные жанры, иначе любой.
+        """
+
+        slugs = {slug for slug in value.split(',') if slug}
+        if not slugs:
+            return queryset
+        if self.form.cleaned_data.get('genre_match') == 'all':
+            groups = [{slug} for slug in slugs]
+        else:
+            groups = [slugs]
+        through = Title.genre.through.objects
+        for group in groups:
+            queryset = queryset.filter(pk__in=through.filter(
+                genre__slug__in=group
+            ).values('title_id'))
+        return queryset
+
+    def skip_filter(self, queryset, name, value):
+        return queryset
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """Полнотекстовый поиск по ?search= с ранжированием.
+
+    На SQLite работает через FTS5, на PostgreSQL - через tsvector
+    с GIN-индексом. Без явного ?ordering= результаты упорядочены
+    по релевантности. Если поиск недоступен, ведёт себя как SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        found = full_text_search(queryset, terms) if terms else None
+        if found is None:
+            return super().filter_queryset(request, queryset, view)
+        if filters.OrderingFilter.ordering_param in request.query_params:
+            return found
+        return found.order_by('search_rank', 'pk')
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter, добавляющий id в конец сортировки.
+
+    Порядок равных значений (например, одинаковых рейтингов) становится
+    однозначным между страницами, а ORDER BY rating, id целиком
+    совпадает с составными индексами (поле, id).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering[-1].lstrip('-') in ('id', 'pk'):
+            return ordering
+        direction = '-' if ordering[-1].startswith('-') else ''
+        return (*ordering, f'{direction}id')
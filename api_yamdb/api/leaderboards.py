@@ -0,0 +1,145 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+from reviews.models import Category, Genre, Review, Title
+
+from .cache import get_response_cache
+from .serializers import TitleRatingSerializer
+
+
+def serialize_titles(ids):
+    """Сериализованные произведения в порядке ids."""
+
+    titles = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').in_bulk(ids)
+    return list(TitleRatingSerializer(
+        [titles[title_id] for title_id in ids if title_id in titles],
+        many=True,
+    ).data)
+
+
+def compute_top(category=None, genre=None):
+    """Лучшие по рейтингу произведения, при необходимости - в категории
+    или жанре."""
+
+    titles = Title.objects.filter(rating__isnull=False)
+    if category is not None:
+        titles = titles.filter(category__slug=category)
+    if genre is not None:
+        titles = titles.filter(pk__in=Title.genre.through.objects.filter(
+            genre__slug=genre
+        ).values('title_id'))
+    return serialize_titles(list(titles.order_by(
+        '-rating', '-reviews_count', '-id'
+    ).values_list('id', flat=True)[:settings.LEADERBOARD_SIZE]))
+
+
+def compute_trending():
+    """Произведения с наибольшим числом отзывов за последние
+    TRENDING_WINDOW_DAYS дней."""
+
+    since = timezone.now() - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    counts = dict(Review.objects.filter(pub_date__gte=since).values(
+        'title_id'
+    ).annotate(
+        recent=Count('id')
+    ).order_by(
+        '-recent', '-title_id'
+    ).values_list('title_id', 'recent')[:settings.LEADERBOARD_SIZE])
+    rows = serialize_titles(list(counts))
+    for row in rows:
+        row['recent_reviews'] = counts[row['id']]
+    return rows
+
+
+LEADERBOARDS = {
+    'top': compute_top,
+    'trending': compute_trending,
+}
+
+# Модели, по слагу которых можно сузить рейтинг.
+PARAM_MODELS = {
+    'category': Category,
+    'genre': Genre,
+}
+
+
+def get_leaderboard_key(kind, params):
+    query = ':'.join(f'{name}={params[name]}' for name in sorted(params))
+    return f'leaderboard:{kind}:{query}'
+
+
+def params_exist(params):
+    """Есть ли категории и жанры с переданными слагами."""
+
+    return all(
+        PARAM_MODELS[name].objects.filter(slug=slug).exists()
+        for name, slug in params.items()
+    )
+
+
+def refresh_leaderboard(kind, **params):
+    """Пересчитывает снимок рейтинга и сохраняет его в кэш API.
+
+    Снимок хранится LEADERBOARD_SNAPSHOT_TIMEOUT секунд: снимки удалённых
+    категорий и жанров не копятся в кэше.
+    """
+
+    snapshot = {
+        'expires': time.time() + settings.LEADERBOARD_REFRESH_INTERVAL,
+        'rows': LEADERBOARDS[kind](**params),
+    }
+    get_response_cache().set(
+        get_leaderboard_key(kind, params), snapshot,
+        settings.LEADERBOARD_SNAPSHOT_TIMEOUT,
+    )
+    return snapshot
+
+
+def get_leaderboard(kind, **params):
+    """Строки рейтинга из последнего снимка.
+
+    Снимок пересчитывается не чаще раза в LEADERBOARD_REFRESH_INTERVAL
+    секунд: устаревший снимок пересчитывает один запрос, остальные
+    в это время получают прежний. Изменения произведений и отзывов
+    попадают в рейтинг со следующим пересчётом. Для несуществующих
+    категорий и жанров снимок не создаётся.
+    """
+
+    cache = get_response_cache()
+    key = get_leaderboard_key(kind, params)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        if not params_exist(params):
+            return []
+        return refresh_leaderboard(kind, **params)['rows']
+    if snapshot['expires'] < time.time() and cache.add(
+        f'{key}:refresh', True, settings.LEADERBOARD_REFRESH_INTERVAL
+    ):
+        try:
+            snapshot = refresh_leaderboard(kind, **params)
+        finally:
+            cache.delete(f'{key}:refresh')
+    return snapshot['rows']
+
+
+def refresh_all_leaderboards():
+    """Пересчитывает общий рейтинг, рейтинги всех категорий и жанров
+    и список популярных. Возвращает число снимков."""
+
+    refresh_leaderboard('top')
+    refresh_leaderboard('trending')
+    slugs = [
+        ('category', slug)
+        for slug in Category.objects.values_list('slug', flat=True)
+    ] + [
+        ('genre', slug)
+        for slug in Genre.objects.values_list('slug', flat=True)
+    ]
+    for name, slug in slugs:
+        refresh_leaderboard('top', **{name: slug})
+    return len(slugs) + 2
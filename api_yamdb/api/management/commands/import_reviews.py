@@ -0,0 +1,57 @@
+import json
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk import save_reviews
+
+
+def read_items(path):
+    """Объекты из JSON-массива или NDJSON (по объекту на строку)."""
+
+    with open(path, encoding='utf-8') as file:
+        start = file.read(1024).lstrip()
+        file.seek(0)
+        if start.startswith('['):
+            yield from json.load(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует отзывы из JSON или NDJSON: '
+        '{"title": id, "author": username, "text": ..., "score": ...}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с отзывами.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько отзывов записывать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        items = read_items(options['path'])
+        created = failed = offset = 0
+        try:
+            while True:
+                batch = list(islice(items, options['batch_size']))
+                if not batch:
+                    break
+                for result in save_reviews(batch):
+                    if 'errors' in result:
+                        failed += 1
+                        self.stderr.write(
+                            f'#{offset + result["index"]}: {result["errors"]}'
+                        )
+                    else:
+                        created += 1
+                offset += len(batch)
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        self.stdout.write(
+            f'Загружено отзывов: {created}, с ошибками: {failed}'
+        )
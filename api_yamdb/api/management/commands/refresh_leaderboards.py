@@ -0,0 +1,25 @@
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from api.cache import get_response_cache
+from api.leaderboards import refresh_all_leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает снимки /titles/top/ и /titles/trending/ '
+        '(например, по cron). Веб-процессы увидят их только при общем '
+        'кэше API (API_CACHE_BACKEND).'
+    )
+
+    def handle(self, *args, **options):
+        if isinstance(get_response_cache(), (LocMemCache, DummyCache)):
+            self.stderr.write(
+                'Кэш API локален для процесса: снимки, пересчитанные '
+                'командой, не увидят веб-процессы. Для запуска по cron '
+                'настройте общий кэш (API_CACHE_BACKEND, '
+                'API_CACHE_LOCATION).'
+            )
+        refreshed = refresh_all_leaderboards()
+        self.stdout.write(f'Пересчитано рейтингов: {refreshed}')
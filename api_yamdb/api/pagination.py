@@ -0,0 +1,124 @@
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по плану запроса; на SQLite - точный COUNT(*)."""
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return plan[0]['Plan']['Plan Rows']
+
+
+class KeysetPagination(CursorPagination):
+    """Keyset-пагинация по (pub_date, id) без OFFSET.
+
+    Общее число объектов по умолчанию не считается: ?count=exact
+    возвращает точное значение, ?count=estimate - оценку планировщика.
+    """
+
+    ordering = ('pub_date', 'id')
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page = super().paginate_queryset(queryset, request, view)
+        self.count = self.get_count(queryset, view)
+        return page
+
+    def get_count(self, queryset, view):
+        mode = self.request.query_params.get(self.count_query_param)
+        if mode == COUNT_EXACT:
+            return queryset.count()
+        if mode == COUNT_ESTIMATE:
+            return estimate_count(queryset)
+        return None
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'nullable': True,
+        }
+        return response_schema
+
+
+class ReviewsPagination(KeysetPagination):
+    """Пагинация отзывов: число отзывов берётся из произведения."""
+
+    def get_count(self, queryset, view):
+        return view.get_title().reviews_count
+
+
+def is_nullable(model, ordering_field):
+    try:
+        field = model._meta.get_field(ordering_field.lstrip('-'))
+    except FieldDoesNotExist:
+        return False
+    return field.null
+
+
+class LimitOffsetOrKeysetPagination(LimitOffsetPagination):
+    """LimitOffset по умолчанию, keyset-режим - по ?pagination=cursor.
+
+    Порядок в keyset-режиме задаёт OrderingFilter представления
+    (id для произведений, категорий и жанров), а без него -
+    (pub_date, id). Курсор не умеет сравнивать NULL, поэтому при
+    сортировке по полю, допускающему NULL (например, ?ordering=rating),
+    используется LimitOffset.
+    """
+
+    pagination_query_param = 'pagination'
+    keyset_pagination_class = KeysetPagination
+
+    def use_keyset(self, request, queryset, view):
+        if (
+            request.query_params.get(self.pagination_query_param) != 'cursor'
+            and self.keyset_pagination_class.cursor_query_param
+            not in request.query_params
+        ):
+            return False
+        ordering = self.keyset_pagination_class().get_ordering(
+            request, queryset, view
+        )
+        return not any(
+            is_nullable(queryset.model, field) for field in ordering
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if not self.use_keyset(request, queryset, view):
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = self.keyset_pagination_class()
+        page = self.keyset.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.keyset.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
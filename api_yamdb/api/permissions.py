@@ -1,11 +1,17 @@
 from rest_framework import permissions
 
+from .authentication import resolve_user
+
 
 class IsAdmin(permissions.BasePermission):
-    """Права доступа для админа."""
+    """Права доступа для админа.
+
+    Роль проверяется по записи User даже на чтение: эндпоинты только для
+    админа не должны отвечать по роли из claims токена.
+    """
 
     def has_permission(self, request, view):
-        return request.user.is_admin
+        return resolve_user(request.user).is_admin
 
 
 class IsAuthenticatedAndAdminOrAuthorOrReadOnly(permissions.BasePermission):
@@ -20,7 +26,7 @@ class IsAuthenticatedAndAdminOrAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or request.user == obj.author
+            or obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.is_moderator
         )
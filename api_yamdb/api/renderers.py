@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если он установлен.
+
+    Вывод совпадает с JSONRenderer: компактный UTF-8, U+2028 и U+2029
+    экранированы; отличается только запись чисел с экспонентой (1e16
+    вместо 1e+16). Даты и прочие типы, которые orjson не знает,
+    кодируются JSONEncoder из DRF. С отступами (?format=api, indent=)
+    и без orjson работает обычный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None
+            or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class StreamingListMixin:
+    """Потоковый JSON для больших страниц списка.
+
+    Страница от API_STREAMING_MIN_ROWS объектов сериализуется
+    и отдаётся частями по API_STREAMING_CHUNK_SIZE, поэтому ни список
+    словарей, ни тело ответа целиком в памяти не собираются. Тело
+    совпадает с обычным ответом; для браузерного API и небольших
+    страниц ответ обычный.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.get_serializer(queryset, many=True).data)
+        if (
+            len(page) >= settings.API_STREAMING_MIN_ROWS
+            and isinstance(request.accepted_renderer, JSONRenderer)
+        ):
+            response = self.get_streaming_response(page)
+            if response is not None:
+                return response
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_streaming_response(self, page):
+        renderer = self.request.accepted_renderer
+        envelope = renderer.render(
+            self.paginator.get_paginated_response([]).data,
+            self.request.accepted_media_type,
+        )
+        if not envelope.endswith(b'"results":[]}'):
+            return None
+
+        def stream():
+            yield envelope[:-2]
+            size = settings.API_STREAMING_CHUNK_SIZE
+            for start in range(0, len(page), size):
+                data = self.get_serializer(
+                    page[start:start + size], many=True
+                ).data
+                chunk = renderer.render(data)[1:-1]
+                yield b',' + chunk if start else chunk
+            yield b']}'
+        return StreamingHttpResponse(
+            stream(), content_type=renderer.media_type
+        )
@@ -1,11 +1,42 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.ratings import weighted_rating
 from django.core.exceptions import ValidationError
 from reviews.validators import validate_username
 
+from .fast_serializers import FastListSerializer
+
+
+def is_unique_violation(error, model, name):
+    """Вызвано ли IntegrityError ограничением уникальности name модели.
+
+    PostgreSQL сообщает имя ограничения в diag, MySQL - в тексте ошибки,
+    SQLite - только колонки: "UNIQUE constraint failed: таблица.колонка".
+    """
+
+    diag = getattr(error.__cause__, 'diag', None)
+    if getattr(diag, 'constraint_name', None):
+        return diag.constraint_name == name
+    message = str(error)
+    if name in message:
+        return True
+    constraint = next(
+        constraint for constraint in model._meta.constraints
+        if constraint.name == name
+    )
+    table = model._meta.db_table
+    columns = ', '.join(
+        f'{table}.{model._meta.get_field(field).column}'
+        for field in constraint.fields
+    )
+    return message == f'UNIQUE constraint failed: {columns}'
+
 
 class CategoriesSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Category."""
@@ -55,6 +86,44 @@ class TitleRatingSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'name', 'year', 'description', 'genre', 'category', 'rating',
         )
+        list_serializer_class = FastListSerializer
+
+
+class TitleDetailSerializer(TitleRatingSerializer):
+    """Сериализатор для одного произведения: распределение оценок
+    и взвешенный рейтинг."""
+
+    score_histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    weighted_rating = serializers.SerializerMethodField()
+
+    class Meta(TitleRatingSerializer.Meta):
+        fields = TitleRatingSerializer.Meta.fields + (
+            'score_histogram', 'weighted_rating',
+        )
+
+    def get_weighted_rating(self, obj):
+        return weighted_rating(obj)
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент пакетной загрузки произведений.
+
+    Слаги жанров и категории только проверяются на формат: объекты
+    для всего пакета загружаются отдельно, по запросу на модель.
+    Элемент с id обновляет существующее произведение.
+    """
+
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), allow_empty=False
+    )
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category',)
 
 
 class ReviewsSerializer(serializers.ModelSerializer):
@@ -69,22 +138,40 @@ class ReviewsSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        if request.method == 'POST':
-            title_id = self.context['view'].kwargs["title_id"]
-            author = self.context['request'].user
-            title = get_object_or_404(Title, pk=title_id)
-            if Review.objects.filter(title=title, author=author).exists():
-                raise serializers.ValidationError(
+    def create(self, validated_data):
+        # Повторный отзыв отсекает ограничение unique_review: без
+        # предварительного exists() и без гонки параллельных запросов.
+        # Прочие нарушения целостности (например, произведение удалено
+        # параллельно) пробрасываются дальше.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as error:
+            if not is_unique_violation(error, Review, 'unique_review'):
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
                     'Нельзя создавать несколько отзывов на произведение'
-                )
-        return data
+                ]
+            })
 
     class Meta:
         fields = (
             'id', 'text', 'author', 'score', 'pub_date', 'title')
         model = Review
+        list_serializer_class = FastListSerializer
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    """Элемент пакетного импорта отзывов: id произведения и username
+    автора проверяются вместе для всего пакета."""
+
+    title = serializers.IntegerField()
+    author = serializers.CharField(max_length=settings.MAX_USERNAME_LEN)
+
+    class Meta:
+        fields = ('title', 'author', 'text', 'score')
+        model = Review
 
 
 class CommentsSerializer(serializers.ModelSerializer):
@@ -103,6 +190,7 @@ class CommentsSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'text', 'author', 'pub_date', 'review')
         model = Comment
+        list_serializer_class = FastListSerializer
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -129,25 +217,47 @@ class UserCreateSerializer(serializers.Serializer):
                                      max_length=settings.MAX_USERNAME_LEN)
 
     def validate(self, data):
-        """Валидатор."""
+        """Валидатор: конфликты username и email ищутся одним запросом.
 
-        validate_username(data['username'])
+        Если пользователь с такой парой уже есть, он становится instance,
+        и save() вернёт его без записи в базу.
+        """
 
-        if (
-            User.objects.filter(username=data['username']).exists()
-            and User.objects.filter(email=data['email']).exists()
-        ):
-            return data
+        validate_username(data['username'])
 
-        if User.objects.filter(email=data['email']).exists():
+        users = User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        )[:2]
+        for user in users:
+            if (
+                user.username == data['username']
+                and user.email == data['email']
+            ):
+                self.instance = user
+                return data
+
+        if any(user.email == data['email'] for user in users):
             raise ValidationError('Пользователь с таким email уже существует.')
 
-        if User.objects.filter(username=data['username']).exists():
+        if users:
             raise ValidationError(
                 'Пользователь с таким username уже существует.')
 
         return data
 
+    def create(self, validated_data):
+        # Параллельная регистрация с теми же данными упрётся
+        # в уникальные индексы username и email.
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                'Пользователь с таким username или email уже существует.')
+
+    def update(self, instance, validated_data):
+        return instance
+
 
 class UserAccessTokenSerializer(serializers.Serializer):
     """Сериализатор для получения токена."""
@@ -157,10 +267,14 @@ class UserAccessTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
     def validate(self, data):
+        """Проверяет код и кладёт найденного пользователя в data['user'],
+        чтобы токен выдавался без повторного запроса к базе."""
+
         user = get_object_or_404(User, username=data['username'])
         if not default_token_generator.check_token(
             user, data['confirmation_code']
         ):
             raise serializers.ValidationError(
                 {'confirmation_code': 'Неверный код подтверждения'})
+        data['user'] = user
         return data
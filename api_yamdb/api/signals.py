@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title, User
+
+from .autocomplete import title_index
+from .cache import invalidate
+
+CACHE_NAMESPACES = {
+    Category: 'category',
+    Genre: 'genre',
+    Title: 'title',
+    Review: 'review',
+    # Имя автора выводится в каждом отзыве и комментарии.
+    User: 'user',
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, **kwargs):
+    if sender in CACHE_NAMESPACES:
+        invalidate(CACHE_NAMESPACES[sender])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate('title')
+
+
+@receiver(post_save, sender=Title)
+def index_title_name(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: title_index.add(instance.pk, instance.name)
+    )
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title_name(sender, instance, **kwargs):
+    title_id = instance.pk
+    transaction.on_commit(lambda: title_index.remove(title_id))
@@ -4,7 +4,7 @@ from rest_framework.routers import SimpleRouter
 
 from .views import (CategoriesViewSet, CommentsViewSet, GenresViewSet,
                     ReviewsViewSet, TitlesViewSet, UserViewSet, get_token,
-                    registration)
+                    registration, reviews_bulk)
 
 router_v1 = SimpleRouter()
 router_v1.register('users', UserViewSet, basename='users')
@@ -25,4 +25,5 @@ urlpatterns = [
     path(f'{API_VERSION}/', include(router_v1.urls)),
     path(f'{API_VERSION}/auth/signup/', registration),
     path(f'{API_VERSION}/auth/token/', get_token),
+    path(f'{API_VERSION}/reviews/bulk/', reviews_bulk),
 ]
@@ -1,27 +1,60 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.decorators import (action, api_view, parser_classes,
+                                       permission_classes)
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 from reviews.models import Category, Genre, Review, Title, User
-
-from .filters import TitlesFilter
+from reviews.outbox import enqueue_email
+from reviews.ratings import apply_review_change
+
+from .authentication import get_access_token, resolve_user
+from .autocomplete import title_index
+from .bulk import save_reviews, save_titles
+from .cache import CachedResponseMixin, ConditionalListMixin
+from .filters import (FullTextSearchFilter, StableOrderingFilter,
+                      TitlesFilter)
+from .leaderboards import get_leaderboard
+from .pagination import LimitOffsetOrKeysetPagination, ReviewsPagination
+from .parsers import NDJSONParser
 from .permissions import (IsAdmin, IsAuthenticatedAndAdminOrAuthorOrReadOnly,
                           IsAuthenticatedAndAdminOrSuperuserOrReadOnly)
+from .renderers import StreamingListMixin
 from .serializers import (CategoriesSerializer, CommentsSerializer,
                           GenresSerializer, ReviewsSerializer,
-                          TitleRatingSerializer, TitlesSerializer,
-                          UserAccessTokenSerializer, UserCreateSerializer,
-                          UserSerializer)
+                          TitleDetailSerializer, TitleRatingSerializer,
+                          TitlesSerializer, UserAccessTokenSerializer,
+                          UserCreateSerializer, UserSerializer)
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+def check_bulk_items(items):
+    """Ответ 400, если тело пакетного запроса - не список допустимой
+    длины, иначе None."""
+
+    if not isinstance(items, list):
+        return Response(
+            {'detail': 'Ожидается список объектов.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(items) > settings.BULK_MAX_ITEMS:
+        return Response(
+            {'detail': f'Не больше {settings.BULK_MAX_ITEMS} объектов '
+             'за раз.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
 
 
 class CategoriesGenresMixin(
+    CachedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -29,10 +62,10 @@ class CategoriesGenresMixin(
 ):
     """Миксин для повторяющегося кода."""
 
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrKeysetPagination
     lookup_field = 'slug'
     permission_classes = (IsAuthenticatedAndAdminOrSuperuserOrReadOnly,)
-    filter_backends = (filters.SearchFilter, filters.OrderingFilter,)
+    filter_backends = (filters.OrderingFilter, FullTextSearchFilter,)
     search_fields = ('name',)
     ordering = ('id',)
 
@@ -42,6 +75,7 @@ class CategoriesViewSet(CategoriesGenresMixin):
 
     queryset = Category.objects.all()
     serializer_class = CategoriesSerializer
+    cache_namespaces = ('category',)
 
 
 class GenresViewSet(CategoriesGenresMixin):
@@ -49,71 +83,196 @@ class GenresViewSet(CategoriesGenresMixin):
 
     queryset = Genre.objects.all()
     serializer_class = GenresSerializer
+    cache_namespaces = ('genre',)
 
 
-class TitlesViewSet(viewsets.ModelViewSet):
+class TitlesViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """ViewSet для модели Titles."""
 
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = TitlesSerializer
     permission_classes = (IsAuthenticatedAndAdminOrSuperuserOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrKeysetPagination
     filterset_class = TitlesFilter
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter,)
+    filter_backends = (
+        DjangoFilterBackend, StableOrderingFilter, FullTextSearchFilter,
+    )
+    search_fields = ('name',)
+    ordering_fields = ('id', 'name', 'year', 'rating')
     ordering = ('id',)
     http_method_names = ('get', 'post', 'head', 'patch', 'delete',)
+    cache_namespaces = ('title', 'category', 'genre', 'review')
 
     def get_serializer_class(self):
         if self.request.method not in SAFE_METHODS:
             return TitlesSerializer
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
         return TitleRatingSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_limit(self, default, maximum):
+        try:
+            limit = int(self.request.query_params.get('limit', default))
+        except ValueError:
+            limit = default
+        return min(max(limit, 0), maximum)
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        """Подсказки по началу слов названия: ?q=<префикс>&limit=<k>."""
+
+        return Response([
+            {'id': title_id, 'name': name}
+            for title_id, name in title_index.search(
+                request.query_params.get('q', ''),
+                self.get_limit(10, AUTOCOMPLETE_MAX_LIMIT),
+            )
+        ])
+
+    @action(
+        detail=False, methods=['post'],
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk(self, request):
+        """Пакетное создание и обновление: JSON-массив или NDJSON.
+
+        Элементы с id обновляют произведения, остальные создаются.
+        В ответе - статус и id или ошибки для каждого элемента.
+        """
+
+        return check_bulk_items(request.data) or Response(
+            save_titles(request.data)
+        )
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие по рейтингу: ?category=<slug>, ?genre=<slug>, ?limit=."""
+
+        params = {
+            name: request.query_params[name]
+            for name in ('category', 'genre')
+            if name in request.query_params
+        }
+        limit = self.get_limit(10, settings.LEADERBOARD_SIZE)
+        return Response(get_leaderboard('top', **params)[:limit])
+
+    @action(detail=False)
+    def trending(self, request):
+        """Больше всего отзывов за последние TRENDING_WINDOW_DAYS дней."""
+
+        limit = self.get_limit(10, settings.LEADERBOARD_SIZE)
+        return Response(get_leaderboard('trending')[:limit])
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+
+class ReviewsViewSet(
+    ConditionalListMixin, StreamingListMixin, viewsets.ModelViewSet
+):
     """ViewSet для модели Reviews."""
 
     serializer_class = ReviewsSerializer
+    pagination_class = ReviewsPagination
     permission_classes = (IsAuthenticatedAndAdminOrAuthorOrReadOnly,)
     http_method_names = ('get', 'post', 'head', 'patch', 'delete',)
 
     def get_title(self):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id'))
-        return title
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title,
+                id=self.kwargs.get('title_id'))
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
+
+    def get_fingerprint_parts(self):
+        # Название произведения выводится в каждом отзыве.
+        title = self.get_title()
+        return title.reviews_version, title.name
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
+        review = serializer.save(
+            author=resolve_user(self.request.user),
             title=self.get_title()
         )
+        apply_review_change(review.title_id, new_score=review.score)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        review = serializer.save()
+        apply_review_change(
+            review.title_id, old_score=old_score, new_score=review.score
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Рейтинг меняется, только если строку удалил этот запрос:
+        # параллельное удаление того же отзыва вернёт 0.
+        _, deleted = instance.delete()
+        if deleted.get(Review._meta.label):
+            apply_review_change(instance.title_id, old_score=instance.score)
 
 
-class CommentsViewSet(viewsets.ModelViewSet):
+class CommentsViewSet(
+    ConditionalListMixin, StreamingListMixin, viewsets.ModelViewSet
+):
     """ViewSet для модели Comments."""
 
     serializer_class = CommentsSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrKeysetPagination
     permission_classes = (IsAuthenticatedAndAdminOrAuthorOrReadOnly,)
     http_method_names = ('get', 'post', 'head', 'patch', 'delete',)
 
     def get_review(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'))
-        return review
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'))
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        # Менеджер связи проставляет comment.review загруженным отзывом,
+        # поэтому поле review не требует запроса на каждую строку.
+        return self.get_review().comments.select_related('author')
+
+    def get_fingerprint_parts(self):
+        # Текст отзыва выводится в каждом комментарии.
+        review = self.get_review()
+        return review.comments_version, review.text
+
+    def touch_review(self, review_id):
+        """Увеличивает comments_version: от неё зависит ETag списка."""
+
+        Review.objects.filter(pk=review_id).update(
+            comments_version=F('comments_version') + 1
+        )
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
+        comment = serializer.save(
+            author=resolve_user(self.request.user),
             review=self.get_review()
         )
+        self.touch_review(comment.review_id)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        comment = serializer.save()
+        self.touch_review(comment.review_id)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        self.touch_review(instance.review_id)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -130,13 +289,14 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(methods=['patch', 'get'], detail=False,
             permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
+        user = resolve_user(request.user)
         if request.method == 'GET':
-            serializer = UserSerializer(self.request.user)
+            serializer = UserSerializer(user)
         else:
             serializer = UserSerializer(
-                self.request.user, data=request.data, partial=True)
+                user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role, partial=True)
+            serializer.save(role=user.role, partial=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -145,27 +305,19 @@ class UserViewSet(viewsets.ModelViewSet):
 def registration(request):
     """Функция для регистрации."""
 
-    user = UserCreateSerializer(data=request.data)
-    user.is_valid(raise_exception=True)
-    email = user.data['email']
-    username = user.data['username']
-    data = user.data
-
-    user, created = User.objects.get_or_create(
-        email=email,
-        username=username)
+    serializer = UserCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    user = serializer.save()
 
     confirmation_code = default_token_generator.make_token(user)
 
-    send_mail(
+    enqueue_email(
         subject='Confirmation code',
-        message=f"Your code - {confirmation_code}",
-        from_email=None,
-        recipient_list=[email],
-        fail_silently=False
+        body=f"Your code - {confirmation_code}",
+        recipient=user.email,
     )
     return Response(
-        data,
+        serializer.data,
         status=status.HTTP_200_OK
     )
 
@@ -177,7 +329,16 @@ def get_token(request):
 
     serializer = UserAccessTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    username = serializer.validated_data["username"]
-    user = get_object_or_404(User, username=username)
-    token = AccessToken.for_user(user)
+    token = get_access_token(serializer.validated_data['user'])
     return Response({'token': str(token)}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, IsAdmin])
+@parser_classes([JSONParser, NDJSONParser])
+def reviews_bulk(request):
+    """Пакетный импорт отзывов партнёров: JSON-массив или NDJSON."""
+
+    return check_bulk_items(request.data) or Response(
+        save_reviews(request.data)
+    )
@@ -72,6 +72,49 @@ DATABASES = {
 }
 
 
+# Cache
+
+# Для общего кэша нескольких процессов, например:
+# API_CACHE_BACKEND=django_redis.cache.RedisCache
+# API_CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': os.getenv(
+            'API_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', 'api'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+API_RESPONSE_CACHE_ALIAS = 'api'
+
+# Скомпилированный вывод списков (api/fast_serializers.py).
+API_FAST_SERIALIZERS = os.getenv('API_FAST_SERIALIZERS', '1') == '1'
+
+# Снимки /titles/top/ и /titles/trending/: длина списка, период
+# пересчёта и срок хранения снимка в кэше в секундах, окно для
+# популярных в днях.
+LEADERBOARD_SIZE = 100
+LEADERBOARD_REFRESH_INTERVAL = 300
+LEADERBOARD_SNAPSHOT_TIMEOUT = 3600
+TRENDING_WINDOW_DAYS = 7
+
+# Взвешенный рейтинг: сколько «средних» оценок добавляется к оценкам
+# произведения и сколько секунд кэшируется средняя по всем отзывам.
+RATING_PRIOR_WEIGHT = 5
+RATING_GLOBAL_MEAN_TIMEOUT = 300
+
+# Наибольшее число объектов в одном запросе к /titles/bulk/
+# и /reviews/bulk/.
+BULK_MAX_ITEMS = 5000
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -132,21 +175,34 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAdminUser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
 
+# Страницы списков отзывов и комментариев от API_STREAMING_MIN_ROWS
+# объектов отдаются потоком по API_STREAMING_CHUNK_SIZE объектов.
+API_STREAMING_MIN_ROWS = 500
+API_STREAMING_CHUNK_SIZE = 100
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Для локальной разработки подойдёт
+# django.core.mail.backends.filebased.EmailBackend (письма в EMAIL_FILE_PATH).
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'
+)
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_FROM_EMAIL = 'qqudra@gmail.com'
 
@@ -156,3 +212,9 @@ EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_HOST_USER = 'kondratevsender@gmail.com'
 EMAIL_HOST_PASSWORD = 'bdpi oudn ygyx wtvk'
+
+# Очередь писем: 0 обработчиков - отправка сразу после коммита запроса.
+EMAIL_OUTBOX_WORKERS = int(os.getenv('EMAIL_OUTBOX_WORKERS', 2))
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
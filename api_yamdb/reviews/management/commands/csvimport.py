@@ -0,0 +1,261 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F
+from api_yamdb import settings
+
+from reviews.models import (Category, Comment, Genre, Review, Title, User)
+from reviews.ratings import rebuild_ratings
+
+# Файл, модель и файлы, которые должны быть загружены раньше него.
+CSV_FILES = (
+    ('users.csv', User, ()),
+    ('category.csv', Category, ()),
+    ('genre.csv', Genre, ()),
+    ('titles.csv', Title, ('category.csv',)),
+    ('genre_title.csv', Title.genre.through, ('titles.csv', 'genre.csv')),
+    ('review.csv', Review, ('titles.csv', 'users.csv')),
+    ('comments.csv', Comment, ('review.csv', 'users.csv')),
+)
+
+
+def get_columns(model, fieldnames):
+    # author, category -> author_id, category_id; title_id остаётся.
+    return [model._meta.get_field(column).attname for column in fieldnames]
+
+
+def read_columns(path, model):
+    with open(path, encoding='utf-8') as csvfile:
+        return get_columns(model, next(csv.reader(csvfile)))
+
+
+def read_chunks(path, model, chunk_size, skip=0):
+    """Читает CSV и отдаёт списки объектов модели по chunk_size штук.
+
+    Первые skip строк пропускаются - они уже загружены.
+    """
+
+    with open(path, encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        columns = get_columns(model, reader.fieldnames)
+        rows = islice(
+            (dict(zip(columns, row.values())) for row in reader), skip, None
+        )
+        while True:
+            chunk = [build_object(model, row)
+                     for row in islice(rows, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+
+@contextmanager
+def keep_csv_dates(model, columns):
+    """Отключает auto_now_add и auto_now у полей, которые есть в CSV.
+
+    bulk_create вызывает pre_save, и без этого pub_date из файла
+    заменилась бы временем загрузки. Поля без колонки в файле
+    (например, updated) заполняются как обычно.
+    """
+
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in columns and (
+            getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+        )
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def build_object(model, row):
+    if model is User:
+        row.setdefault('password', make_password(None))
+    return model(**row)
+
+
+class Checkpoint:
+    """Сколько строк каждого файла уже закоммичено.
+
+    Хранится в JSON-файле; без пути ничего не запоминает.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.state = json.load(file)
+
+    def rows(self, csv_file):
+        return self.state.get(csv_file, {}).get('rows', 0)
+
+    def is_done(self, csv_file):
+        return self.state.get(csv_file, {}).get('done', False)
+
+    def save(self, csv_file, rows, done=False):
+        if not self.path:
+            return
+        with self.lock:
+            self.state[csv_file] = {'rows': rows, 'done': done}
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.state, file)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные из static/data/*.csv пачками через bulk_create. '
+        'Независимые файлы грузятся параллельно, зависимые - как только '
+        'загружены их родители.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'static/data/'),
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Число строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число параллельных загрузчиков (на SQLite всегда 1).',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Файл контрольной точки. С ним каждая пачка коммитится '
+                'отдельно, а прерванная загрузка продолжается с последней '
+                'закоммиченной пачки.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.chunk_size = options['chunk_size']
+        self.checkpoint = Checkpoint(options['checkpoint'])
+        workers = options['workers']
+        if connection.vendor == 'sqlite':
+            # SQLite допускает только одного писателя.
+            workers = 1
+        self.run_scheduler(max(workers, 1))
+        with transaction.atomic():
+            rebuild_ratings()
+            # Комментарии загружены мимо API: меняем версии их списков.
+            Review.objects.update(comments_version=F('comments_version') + 1)
+            self.reset_sequences()
+        self.checkpoint.remove()
+
+    def run_scheduler(self, workers):
+        """Запускает файл, как только загружены все его зависимости."""
+
+        done = {
+            csv_file for csv_file, _, _ in CSV_FILES
+            if self.checkpoint.is_done(csv_file)
+        }
+        pending = [spec for spec in CSV_FILES if spec[0] not in done]
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for spec in [spec for spec in pending
+                             if done.issuperset(spec[2])]:
+                    pending.remove(spec)
+                    future = executor.submit(self.load_file, *spec[:2])
+                    running[future] = spec[0]
+                if not running:
+                    raise CommandError(
+                        'Не удалось упорядочить файлы по зависимостям.'
+                    )
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    csv_file = running.pop(future)
+                    if future.exception():
+                        for other in running:
+                            other.cancel()
+                        raise CommandError(
+                            f'{csv_file}: {future.exception()}'
+                        ) from future.exception()
+                    done.add(csv_file)
+
+    def load_file(self, csv_file, model):
+        """Загружает один файл в собственном соединении с БД."""
+
+        path = os.path.join(self.path, csv_file)
+        try:
+            started = time.monotonic()
+            skipped = self.checkpoint.rows(csv_file)
+            chunks = read_chunks(path, model, self.chunk_size, skip=skipped)
+            rows = skipped
+            with keep_csv_dates(model, read_columns(path, model)):
+                if self.checkpoint.path:
+                    rows = self.load_with_checkpoint(
+                        csv_file, model, chunks, rows
+                    )
+                else:
+                    with transaction.atomic():
+                        for chunk in chunks:
+                            model.objects.bulk_create(chunk)
+                            rows += len(chunk)
+            self.checkpoint.save(csv_file, rows, done=True)
+        finally:
+            connection.close()
+        elapsed = time.monotonic() - started
+        loaded = rows - skipped
+        self.stdout.write(
+            f'{csv_file}: {loaded} строк за {elapsed:.2f} с '
+            f'({loaded / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    def load_with_checkpoint(self, csv_file, model, chunks, rows):
+        """Коммитит каждую пачку и записывает её в контрольную точку.
+
+        Пачка коммитится раньше, чем попадает в контрольную точку: если
+        загрузка прервалась между ними, после возобновления её строки
+        уже есть в базе. Поэтому, пока в очередной пачке находятся уже
+        загруженные id, она вставляется с ignore_conflicts.
+        """
+
+        resuming = True
+        for chunk in chunks:
+            with transaction.atomic():
+                if resuming:
+                    resuming = model.objects.filter(
+                        pk__in=[obj.pk for obj in chunk]
+                    ).exists()
+                model.objects.bulk_create(chunk, ignore_conflicts=resuming)
+            rows += len(chunk)
+            self.checkpoint.save(csv_file, rows)
+        return rows
+
+    def reset_sequences(self):
+        """После вставки явных id сдвигает счётчики (нужно PostgreSQL)."""
+
+        models = [model for _, model, _ in CSV_FILES]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
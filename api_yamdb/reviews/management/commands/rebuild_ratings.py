@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг, число отзывов и сумму оценок произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='id произведений; по умолчанию пересчитываются все.',
+        )
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_ids']:
+            titles = titles.filter(pk__in=options['title_ids'])
+        with transaction.atomic():
+            updated = rebuild_ratings(titles)
+        self.stdout.write(f'Пересчитано произведений: {updated}')
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди (для отдельного обработчика).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Разбирать очередь повторно каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_pending()
+            if sent:
+                self.stdout.write(f'Отправлено писем: {sent}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
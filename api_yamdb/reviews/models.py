@@ -69,12 +69,15 @@ class NameSlugBaseModel(models.Model):
         max_length=settings.MAX_SLUG_LEN, verbose_name='Слаг', unique=True,
     )
 
+    class Meta:
+        abstract = True
+
     def __str__(self) -> str:
         return self.title
 
 
 class TextPubdateBaseModel(models.Model):
-    """Миксин для полей text и pubdate."""
+    """Миксин для полей text, pubdate и updated."""
 
     text = models.CharField(
         max_length=settings.TEXT_LENGTH,
@@ -85,6 +88,13 @@ class TextPubdateBaseModel(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    updated = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True
+    )
+
+    class Meta:
+        abstract = True
 
     def __str__(self) -> str:
         return self.text
@@ -129,15 +139,113 @@ class Title(models.Model):
         verbose_name='Категория произведения',
         on_delete=models.SET_NULL,
         null=True,
+        # Поиск по category_id обслуживает индекс title_category_idx.
+        db_index=False,
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг произведения',
+        null=True,
+        editable=False,
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    # Число отзывов с каждой оценкой, см. score_count_field.
+    score_1_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 1',
+        default=0,
+        editable=False,
+    )
+    score_2_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 2',
+        default=0,
+        editable=False,
+    )
+    score_3_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 3',
+        default=0,
+        editable=False,
+    )
+    score_4_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 4',
+        default=0,
+        editable=False,
+    )
+    score_5_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 5',
+        default=0,
+        editable=False,
+    )
+    score_6_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 6',
+        default=0,
+        editable=False,
+    )
+    score_7_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 7',
+        default=0,
+        editable=False,
+    )
+    score_8_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 8',
+        default=0,
+        editable=False,
+    )
+    score_9_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 9',
+        default=0,
+        editable=False,
+    )
+    score_10_count = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 10',
+        default=0,
+        editable=False,
+    )
+    reviews_version = models.PositiveIntegerField(
+        verbose_name='Версия списка отзывов',
+        default=0,
+        editable=False,
     )
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=('year', 'id'), name='title_year_idx'),
+            models.Index(
+                fields=('category', 'id'), name='title_category_idx'
+            ),
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+            models.Index(fields=('rating', 'id'), name='title_rating_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    @property
+    def score_histogram(self):
+        """Число отзывов с каждой оценкой: {оценка: количество}."""
+
+        return {
+            score: getattr(self, score_count_field(score)) for score in SCORES
+        }
+
+
+SCORES = range(settings.MIN_VALUE, settings.MAX_VALUE + 1)
+
+
+def score_count_field(score):
+    """Имя поля Title со счётчиком отзывов с оценкой score."""
+
+    return f'score_{score}_count'
+
 
 class Review(TextPubdateBaseModel):
     """Модель для отзывов."""
@@ -146,7 +254,9 @@ class Review(TextPubdateBaseModel):
         Title,
         on_delete=models.CASCADE,
         related_name='reviews',
-        verbose_name='произведение'
+        verbose_name='произведение',
+        # Поиск по title_id обслуживает индекс review_title_pub_date_idx.
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -162,6 +272,11 @@ class Review(TextPubdateBaseModel):
         ),
         error_messages={'validators': 'Оценка от 1 до 10!'}
     )
+    comments_version = models.PositiveIntegerField(
+        verbose_name='Версия списка комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -171,6 +286,12 @@ class Review(TextPubdateBaseModel):
                 fields=('title', 'author',),
                 name='unique_review'
             )]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         ordering = ('pub_date',)
 
 
@@ -181,7 +302,9 @@ class Comment(TextPubdateBaseModel):
         Review,
         on_delete=models.CASCADE,
         related_name='comments',
-        verbose_name='отзыв'
+        verbose_name='отзыв',
+        # Поиск по review_id обслуживает индекс comment_review_pub_date_idx.
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -193,3 +316,53 @@ class Comment(TextPubdateBaseModel):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=settings.MAX_EMAIL_LEN
+    )
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=settings.MAX_CHAR_LEN
+    )
+    body = models.TextField(verbose_name='Текст письма')
+    created = models.DateTimeField(
+        verbose_name='дата создания',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='дата отправки',
+        null=True,
+        db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='попыток отправки',
+        default=0
+    )
+    claim = models.CharField(
+        verbose_name='метка обработчика',
+        max_length=32,
+        null=True
+    )
+    claimed_at = models.DateTimeField(
+        verbose_name='взято в работу',
+        null=True
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('id',)
+
+    def __str__(self) -> str:
+        return f'{self.subject} -> {self.recipient}'
@@ -0,0 +1,145 @@
+import logging
+import smtplib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enqueue_email(subject, body, recipient):
+    """Ставит письмо в очередь; отправка начнётся после коммита."""
+
+    email = OutgoingEmail.objects.create(
+        subject=subject, body=body, recipient=recipient
+    )
+    transaction.on_commit(dispatch)
+    return email
+
+
+def dispatch():
+    """Будит фоновый пул; при EMAIL_OUTBOX_WORKERS = 0 отправляет сразу.
+
+    Не бросает исключений: письма остаются в очереди, а ошибка
+    отправки не должна ломать запрос, поставивший письмо.
+    """
+
+    if not settings.EMAIL_OUTBOX_WORKERS:
+        deliver_safely()
+        return
+    get_executor().submit(_drain_in_worker)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EMAIL_OUTBOX_WORKERS,
+                thread_name_prefix='email-outbox',
+            )
+    return _executor
+
+
+def deliver_safely():
+    try:
+        deliver_pending()
+    except Exception:
+        logger.exception('Не удалось разобрать очередь писем')
+
+
+def _drain_in_worker():
+    try:
+        deliver_safely()
+    finally:
+        connection.close()
+
+
+def claim_batch(batch_size):
+    """Помечает пачку писем меткой обработчика и возвращает её.
+
+    Метка ставится UPDATE с повторной проверкой условий, поэтому одно
+    письмо не достанется двум обработчикам ни на одной СУБД. Письмо,
+    отправка которого не удалась, остаётся помеченным до истечения
+    EMAIL_OUTBOX_RETRY_DELAY - это пауза перед повторной попыткой.
+    """
+
+    now = timezone.now()
+    available = OutgoingEmail.objects.filter(
+        Q(claimed_at__isnull=True)
+        | Q(claimed_at__lt=now - timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY)),
+        sent_at__isnull=True,
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+    ids = list(available.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    claim = uuid.uuid4().hex
+    available.filter(pk__in=ids).update(claim=claim, claimed_at=now)
+    return list(OutgoingEmail.objects.filter(claim=claim))
+
+
+def send_batch(batch, mail_connection):
+    """Отправляет пачку и отмечает результат; возвращает число писем."""
+
+    sent_ids, failed_ids = [], []
+    for email in batch:
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            to=[email.recipient],
+            connection=mail_connection,
+        )
+        try:
+            message.send()
+        except (smtplib.SMTPException, OSError):
+            logger.exception('Письмо %s не отправлено', email.pk)
+            failed_ids.append(email.pk)
+        else:
+            sent_ids.append(email.pk)
+    OutgoingEmail.objects.filter(pk__in=sent_ids).update(
+        sent_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    OutgoingEmail.objects.filter(pk__in=failed_ids).update(
+        attempts=F('attempts') + 1
+    )
+    return len(sent_ids)
+
+
+def deliver_pending(batch_size=None):
+    """Отправляет очередь пачками через одно переиспользуемое соединение.
+
+    Если соединиться с почтовым сервером не удалось, взятая пачка
+    считается неудачной попыткой и ждёт EMAIL_OUTBOX_RETRY_DELAY, а после
+    EMAIL_OUTBOX_MAX_ATTEMPTS попыток больше не берётся.
+    """
+
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = 0
+    batch = claim_batch(batch_size)
+    if not batch:
+        return sent
+    try:
+        with get_connection() as mail_connection:
+            while batch:
+                sent += send_batch(batch, mail_connection)
+                batch = claim_batch(batch_size)
+    except (smtplib.SMTPException, OSError):
+        logger.exception('Нет соединения с почтовым сервером')
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(attempts=F('attempts') + 1)
+    return sent
@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F,
+                              FloatField, IntegerField, OuterRef, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+
+from .models import SCORES, Review, Title, score_count_field
+
+GLOBAL_MEAN_CACHE_KEY = 'ratings:global_mean'
+
+
+def apply_review_change(title_id, old_score=None, new_score=None):
+    """Обновляет рейтинг произведения после изменения одного отзыва.
+
+    Создание отзыва передаёт только new_score, удаление - только old_score,
+    редактирование - обе оценки. Вызывать внутри той же транзакции,
+    что и запись отзыва: заодно увеличивается reviews_version, по которой
+    строится ETag списка отзывов.
+    """
+
+    count_delta = (new_score is not None) - (old_score is not None)
+    score_delta = (new_score or 0) - (old_score or 0)
+    count = F('reviews_count') + count_delta
+    score_sum = F('score_sum') + score_delta
+    histogram = {}
+    if old_score != new_score:
+        if old_score is not None:
+            field = score_count_field(old_score)
+            histogram[field] = F(field) - 1
+        if new_score is not None:
+            field = score_count_field(new_score)
+            histogram[field] = F(field) + 1
+    Title.objects.filter(pk=title_id).update(
+        **histogram,
+        reviews_count=count,
+        score_sum=score_sum,
+        reviews_version=F('reviews_version') + 1,
+        rating=Case(
+            When(reviews_count=-count_delta, then=Value(None)),
+            default=ExpressionWrapper(
+                Cast(score_sum, FloatField()) / count,
+                output_field=FloatField(),
+            ),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def rebuild_ratings(titles=None):
+    """Пересчитывает рейтинг по таблице отзывов одним UPDATE."""
+
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    histogram = {
+        score_count_field(score): Coalesce(
+            Subquery(reviews.filter(score=score).annotate(
+                value=Count('id')
+            ).values('value')),
+            0,
+            output_field=IntegerField(),
+        )
+        for score in SCORES
+    }
+    return titles.update(
+        **histogram,
+        reviews_version=F('reviews_version') + 1,
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(value=Count('id')).values('value')),
+            0,
+            output_field=IntegerField(),
+        ),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value')),
+            0,
+            output_field=IntegerField(),
+        ),
+        rating=Subquery(
+            reviews.annotate(value=Avg('score')).values('value'),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def get_global_mean():
+    """Средняя оценка по всем отзывам из счётчиков произведений.
+
+    Считается одним агрегатом по Title и хранится в кэше
+    RATING_GLOBAL_MEAN_TIMEOUT секунд.
+    """
+
+    mean = cache.get(GLOBAL_MEAN_CACHE_KEY)
+    if mean is None:
+        totals = Title.objects.aggregate(
+            count=Sum('reviews_count'), score_sum=Sum('score_sum')
+        )
+        if not totals['count']:
+            return None
+        mean = totals['score_sum'] / totals['count']
+        cache.set(
+            GLOBAL_MEAN_CACHE_KEY, mean, settings.RATING_GLOBAL_MEAN_TIMEOUT
+        )
+    return mean
+
+
+def weighted_rating(title, global_mean=None):
+    """Байесовский рейтинг: к оценкам произведения добавляется
+    RATING_PRIOR_WEIGHT средних оценок по всем отзывам.
+
+    Рейтинг по одному-двум отзывам тянется к общей средней, а не
+    занимает верх списка. Использует только хранимые счётчики.
+    """
+
+    if not title.reviews_count:
+        return None
+    if global_mean is None:
+        global_mean = get_global_mean()
+    weight = settings.RATING_PRIOR_WEIGHT
+    return (
+        (weight * global_mean + title.score_sum)
+        / (weight + title.reviews_count)
+    )
@@ -0,0 +1,170 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Category, Genre, Title
+
+# Модель и поля, по которым строится полнотекстовый индекс.
+SEARCH_FIELDS = {
+    Title: ('name', 'description'),
+    Category: ('name',),
+    Genre: ('name',),
+}
+
+
+_backends = {}
+
+
+def get_search_backend(connection):
+    """'fts5', 'postgresql' или None, если полнотекстового поиска нет."""
+
+    if connection.alias not in _backends:
+        backend = None
+        if connection.vendor == 'postgresql':
+            backend = 'postgresql'
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA compile_options')
+                options = {row[0] for row in cursor.fetchall()}
+            if 'ENABLE_FTS5' in options:
+                backend = 'fts5'
+        _backends[connection.alias] = backend
+    return _backends[connection.alias]
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def tsvector_sql(model, qualified=False):
+    prefix = f'"{model._meta.db_table}".' if qualified else ''
+    columns = " || ' ' || ".join(
+        f"coalesce({prefix}\"{model._meta.get_field(field).column}\", '')"
+        for field in SEARCH_FIELDS[model]
+    )
+    return f"to_tsvector('simple', {columns})"
+
+
+def fts5_sync_sql(model):
+    """Список колонок и тела триггеров: удаление и вставка строки FTS5."""
+
+    fts = fts_table(model)
+    columns = [
+        model._meta.get_field(field).column for field in SEARCH_FIELDS[model]
+    ]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    insert = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});'
+    return names, delete, insert
+
+
+def fts5_update_trigger(model):
+    """Триггер обновления срабатывает только при изменении индексируемых
+    колонок: пересчёт рейтинга и счётчиков Title не трогает индекс."""
+
+    table = model._meta.db_table
+    fts = fts_table(model)
+    names, delete, insert = fts5_sync_sql(model)
+    return (
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} '
+        f'BEGIN {delete} {insert} END',
+    )
+
+
+def fts5_statements(model):
+    """Внешняя FTS5-таблица и триггеры, поддерживающие её в актуальном виде."""
+
+    table = model._meta.db_table
+    fts = fts_table(model)
+    names, delete, insert = fts5_sync_sql(model)
+    return (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, '
+        f"content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} '
+        f'BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} '
+        f'BEGIN {delete} END',
+        *fts5_update_trigger(model),
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+def postgresql_statements(model):
+    """GIN-индекс по тому же выражению, что и в запросе поиска."""
+
+    table = model._meta.db_table
+    return (
+        f'CREATE INDEX IF NOT EXISTS {table}_search_idx '
+        f'ON {table} USING GIN (({tsvector_sql(model)}))',
+    )
+
+
+def create_search_indexes(using='default', **kwargs):
+    """Обработчик post_migrate: создаёт поисковые индексы, если их нет."""
+
+    connection = connections[using]
+    backend = get_search_backend(connection)
+    if backend is None:
+        return
+    statements = fts5_statements if backend == 'fts5' else (
+        postgresql_statements
+    )
+    existing = connection.introspection.table_names()
+    with connection.cursor() as cursor:
+        for model in SEARCH_FIELDS:
+            if fts_table(model) in existing:
+                if backend == 'fts5':
+                    # Прежний триггер срабатывал на любой UPDATE.
+                    for sql in fts5_update_trigger(model):
+                        cursor.execute(sql)
+                continue
+            for sql in statements(model):
+                cursor.execute(sql)
+
+
+def get_search_words(terms):
+    return re.findall(r'\w+', ' '.join(terms))
+
+
+def full_text_search(queryset, terms):
+    """Фильтрует queryset по словам (с учётом префиксов) и считает ранг.
+
+    Ранг попадает в аннотацию search_rank: чем меньше, тем лучше.
+    Возвращает None, если для модели или СУБД поиск недоступен.
+    """
+
+    model = queryset.model
+    words = get_search_words(terms)
+    backend = get_search_backend(connections[queryset.db])
+    if model not in SEARCH_FIELDS or backend is None or not words:
+        return None
+    table = model._meta.db_table
+    if backend == 'fts5':
+        fts = fts_table(model)
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (match,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT bm25({fts}) FROM {fts} '
+            f'WHERE {fts} MATCH %s AND rowid = "{table}"."id"',
+            (match,),
+            output_field=FloatField(),
+        ))
+    query = ' & '.join(f'{word}:*' for word in words)
+    vector = tsvector_sql(model, qualified=True)
+    return queryset.filter(RawSQL(
+        f"{vector} @@ to_tsquery('simple', %s)", (query,),
+        output_field=BooleanField(),
+    )).annotate(search_rank=RawSQL(
+        f"-ts_rank({vector}, to_tsquery('simple', %s))", (query,),
+        output_field=FloatField(),
+    ))
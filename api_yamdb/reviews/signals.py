@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Review, Title, User
+from .ratings import rebuild_ratings
+
+
+@receiver(pre_delete, sender=User)
+def remember_reviewed_titles(sender, instance, **kwargs):
+    instance._reviewed_title_ids = set(Review.objects.filter(
+        author_id=instance.pk
+    ).values_list('title_id', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def rebuild_reviewed_titles(sender, instance, **kwargs):
+    """Отзывы удалённого пользователя удаляются каскадом, минуя
+    apply_review_change, поэтому рейтинги его произведений
+    пересчитываются по таблице отзывов."""
+
+    title_ids = getattr(instance, '_reviewed_title_ids', None)
+    if title_ids:
+        rebuild_ratings(Title.objects.filter(pk__in=title_ids))
@@ -0,0 +1,104 @@
+"""Фильтр произведений по жанрам: JOIN + DISTINCT против полусоединения.
+
+Синтетический набор: 100 000 произведений, 20 жанров (по 3 на
+произведение), 50 000 отзывов. Прежний вариант - фильтр genre__slug
+через JOIN с аннотацией Avg('reviews__score'): при нескольких жанрах
+строки размножаются, нужен DISTINCT, а средняя оценка считается по
+размноженным отзывам.
+
+Запуск: python benchmarks/bench_genre_filter.py
+"""
+import random
+
+from django.db.models import Avg
+from utils import benchmark_database, measure, report
+
+from api.filters import TitlesFilter
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.ratings import rebuild_ratings
+
+TITLES = 100_000
+GENRES = 20
+GENRES_PER_TITLE = 3
+USERS = 50
+REVIEWS = 50_000
+BATCH_SIZE = 5_000
+REPEAT = 20
+
+
+def populate():
+    rng = random.Random(0)
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genres = Genre.objects.bulk_create(
+        Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(GENRES)
+    )
+    genre_ids = [genre.id for genre in Genre.objects.order_by('id')]
+    Title.objects.bulk_create(
+        (Title(name=f'Произведение {number}', year=1900 + number % 120,
+               category=category) for number in range(TITLES)),
+        batch_size=BATCH_SIZE,
+    )
+    title_ids = list(Title.objects.values_list('id', flat=True))
+    through = Title.genre.through
+    through.objects.bulk_create(
+        (through(title_id=title_id, genre_id=genre_id)
+         for title_id in title_ids
+         for genre_id in rng.sample(genre_ids, GENRES_PER_TITLE)),
+        batch_size=BATCH_SIZE,
+    )
+    User.objects.bulk_create(
+        User(username=f'user{number}', email=f'user{number}@yamdb.fake')
+        for number in range(USERS)
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    pairs = set()
+    while len(pairs) < REVIEWS:
+        pairs.add((rng.choice(title_ids), rng.choice(user_ids)))
+    Review.objects.bulk_create(
+        (Review(title_id=title_id, author_id=user_id, text='Текст',
+                score=rng.randint(1, 10))
+         for title_id, user_id in pairs),
+        batch_size=BATCH_SIZE,
+    )
+    rebuild_ratings()
+    return [genre.slug for genre in genres]
+
+
+def legacy_queryset(slugs):
+    return Title.objects.filter(genre__slug__in=slugs).annotate(
+        avg_rating=Avg('reviews__score')
+    ).distinct().order_by('id')
+
+
+def semi_join_queryset(query):
+    return TitlesFilter(query, Title.objects.order_by('id')).qs
+
+
+def main():
+    with benchmark_database():
+        slugs = populate()
+        one, two = slugs[:1], slugs[:2]
+        cases = (
+            ('JOIN + DISTINCT, 1 жанр', lambda: legacy_queryset(one)),
+            ('IN (подзапрос), 1 жанр',
+             lambda: semi_join_queryset({'genre': one[0]})),
+            ('JOIN + DISTINCT, 2 жанра', lambda: legacy_queryset(two)),
+            ('IN (подзапрос), 2 жанра (any)',
+             lambda: semi_join_queryset({'genre': ','.join(two)})),
+            ('IN (подзапрос), 2 жанра (all)',
+             lambda: semi_join_queryset(
+                 {'genre': ','.join(two), 'genre_match': 'all'})),
+        )
+        report('count() по фильтру:', [
+            (name, measure(lambda: get_queryset().count(), REPEAT))
+            for name, get_queryset in cases
+        ])
+        report('Первая страница (10 произведений):', [
+            (name, measure(lambda: list(get_queryset()[:10]), REPEAT))
+            for name, get_queryset in cases
+        ])
+
+
+if __name__ == '__main__':
+    main()
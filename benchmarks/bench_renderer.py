@@ -0,0 +1,46 @@
+"""Рендеринг JSON: JSONRenderer из DRF против FastJSONRenderer.
+
+Страница из 1000 сериализованных произведений с жанрами и категорией.
+
+Запуск: python benchmarks/bench_renderer.py
+"""
+from utils import measure, report
+
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+
+ROWS = 1000
+REPEAT = 50
+
+
+def main():
+    page = {
+        'count': ROWS,
+        'next': 'http://testserver/api/v1/titles/?limit=1000&offset=1000',
+        'previous': None,
+        'results': [{
+            'id': number,
+            'name': f'Произведение {number}',
+            'year': 1900 + number % 120,
+            'description': 'Описание произведения ' * 5,
+            'genre': [
+                {'name': 'Драма', 'slug': 'drama'},
+                {'name': 'Комедия', 'slug': 'comedy'},
+            ],
+            'category': {'name': 'Фильмы', 'slug': 'movie'},
+            'rating': number % 10 or None,
+        } for number in range(ROWS)],
+    }
+    plain, fast = JSONRenderer(), FastJSONRenderer()
+    assert plain.render(page) == fast.render(page)
+    report(f'Рендеринг страницы из {ROWS} произведений '
+           f'(orjson: {"да" if orjson else "нет"}):', [
+               ('JSONRenderer', measure(lambda: plain.render(page), REPEAT)),
+               ('FastJSONRenderer',
+                measure(lambda: fast.render(page), REPEAT)),
+           ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Вывод списков: ListSerializer против FastListSerializer.
+
+Объекты загружаются заранее, замеряется только сериализация страницы.
+Для каждой пары проверяется, что JSON совпадает байт в байт.
+
+Запуск: python benchmarks/bench_serializers.py
+"""
+from utils import benchmark_database, measure
+
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (CommentsSerializer, ReviewsSerializer,
+                             TitleRatingSerializer)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+ROWS = 1000
+REPEAT = 20
+
+
+def populate():
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genres = [
+        Genre.objects.create(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(3)
+    ]
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {number}', year=2000, category=category,
+              description='Описание', rating=7.5, reviews_count=2)
+        for number in range(ROWS)
+    )
+    through = Title.genre.through
+    through.objects.bulk_create(
+        through(title_id=title_id, genre_id=genre.id)
+        for title_id in Title.objects.values_list('id', flat=True)
+        for genre in genres[:2]
+    )
+    User.objects.bulk_create(
+        User(username=f'user{number}', email=f'user{number}@yamdb.fake')
+        for number in range(ROWS)
+    )
+    title = Title.objects.first()
+    Review.objects.bulk_create(
+        Review(title=title, author_id=user_id, text='Текст отзыва', score=8)
+        for user_id in User.objects.values_list('id', flat=True)
+    )
+    review = Review.objects.first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author_id=user_id, text='Комментарий')
+        for user_id in User.objects.values_list('id', flat=True)
+    )
+    return title, review
+
+
+def main():
+    with benchmark_database():
+        title, review = populate()
+        cases = (
+            ('TitleRatingSerializer', TitleRatingSerializer, list(
+                Title.objects.select_related('category')
+                .prefetch_related('genre')
+            )),
+            ('ReviewsSerializer', ReviewsSerializer, list(
+                title.reviews.select_related('author')
+            )),
+            ('CommentsSerializer', CommentsSerializer, list(
+                review.comments.select_related('author')
+            )),
+        )
+        renderer = JSONRenderer()
+        print(f'Сериализация {ROWS} объектов (строк в секунду):')
+        for name, serializer_class, objects in cases:
+            rates, rendered = [], []
+            for fast in (False, True):
+                with override_settings(API_FAST_SERIALIZERS=fast):
+                    seconds, _ = measure(
+                        lambda: serializer_class(objects, many=True).data,
+                        REPEAT,
+                    )
+                    rendered.append(renderer.render(
+                        serializer_class(objects, many=True).data
+                    ))
+                rates.append(ROWS / seconds)
+            assert rendered[0] == rendered[1], f'{name}: JSON различается'
+            print(
+                f'  {name:<24} обычный {rates[0]:>10,.0f}   '
+                f'быстрый {rates[1]:>10,.0f}   x{rates[1] / rates[0]:.1f}'
+            )
+        print(f'  (по умолчанию API_FAST_SERIALIZERS = '
+              f'{settings.API_FAST_SERIALIZERS})')
+
+
+if __name__ == '__main__':
+    main()
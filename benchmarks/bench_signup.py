@@ -0,0 +1,66 @@
+"""Запросы к БД при регистрации: прежняя проверка против одного запроса.
+
+Запуск: python benchmarks/bench_signup.py
+"""
+from itertools import count
+
+from utils import benchmark_database, measure, report
+
+from api.serializers import UserCreateSerializer
+from reviews.models import User
+
+REPEAT = 200
+
+
+def legacy_signup(data):
+    """Прежний путь: до четырёх exists() и get_or_create."""
+
+    users = User.objects
+    if not (
+        users.filter(username=data['username']).exists()
+        and users.filter(email=data['email']).exists()
+    ):
+        if users.filter(email=data['email']).exists():
+            return None
+        if users.filter(username=data['username']).exists():
+            return None
+    return users.get_or_create(**data)[0]
+
+
+def signup(data):
+    serializer = UserCreateSerializer(data=data)
+    if serializer.is_valid():
+        return serializer.save()
+    return None
+
+
+def main():
+    with benchmark_database():
+        numbers = count()
+
+        def new_user_data(prefix):
+            number = next(numbers)
+            return {
+                'username': f'{prefix}{number}',
+                'email': f'{prefix}{number}@yamdb.fake',
+            }
+
+        existing = {'username': 'existing', 'email': 'existing@yamdb.fake'}
+        User.objects.create(**existing)
+        conflict = {'username': 'existing', 'email': 'other@yamdb.fake'}
+
+        rows = []
+        for name, func in (('прежняя', legacy_signup), ('новая', signup)):
+            rows.extend((
+                (f'{name}: новый пользователь',
+                 measure(lambda: func(new_user_data('user')), REPEAT)),
+                (f'{name}: повторная регистрация',
+                 measure(lambda: func(existing), REPEAT)),
+                (f'{name}: занятый username',
+                 measure(lambda: func(conflict), REPEAT)),
+            ))
+        report('Регистрация (время и запросы на одну попытку):', rows)
+
+
+if __name__ == '__main__':
+    main()
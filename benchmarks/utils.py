@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'api_yamdb'))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+
+
+@contextmanager
+def benchmark_database():
+    """Временная тестовая база, как в pytest-django."""
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=1):
+    """Возвращает (секунд на вызов, запросов на вызов)."""
+
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = time.perf_counter() - started
+    return elapsed / repeat, len(context.captured_queries) / repeat
+
+
+def report(title, rows):
+    print(title)
+    for name, (seconds, queries) in rows:
+        print(f'  {name:<40} {seconds * 1000:9.3f} мс  {queries:6.1f} запр.')
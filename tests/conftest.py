@@ -1,6 +1,9 @@
 import os
 import sys
 
+import pytest
+from api.autocomplete import title_index
+from django.core.cache import caches
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +36,15 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def send_emails_synchronously(settings):
+    settings.EMAIL_OUTBOX_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+    title_index.reset()
@@ -1,8 +1,10 @@
 from http import HTTPStatus
 
 import pytest
+from django.contrib.auth.tokens import default_token_generator
 from django.core import mail
 from django.db.utils import IntegrityError
+from rest_framework_simplejwt.tokens import AccessToken
 
 from tests.utils import (
     invalid_data_for_user_patch_and_creation,
@@ -375,3 +377,32 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_00_obtain_jwt_token_after_role_change(self, client,
+                                                   django_user_model):
+        user = django_user_model.objects.create(
+            username='cached_user', email='cached_user@yamdb.fake',
+            role='admin'
+        )
+        data = {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert AccessToken(response.json()['token'])['role'] == 'admin'
+
+        django_user_model.objects.filter(pk=user.pk).update(role='user')
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert AccessToken(response.json()['token'])['role'] == 'user', (
+            'Проверьте, что повторный запрос токена с тем же кодом '
+            'подтверждения выдаёт токен с текущей ролью пользователя.'
+        )
+
+        user.delete()
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что удалённый пользователь не может получить токен '
+            'по ранее проверенному коду подтверждения.'
+        )
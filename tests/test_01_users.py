@@ -1,6 +1,10 @@
 from http import HTTPStatus
 
 import pytest
+from api.authentication import get_access_token
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
 from tests.utils import (
     check_pagination, invalid_data_for_user_patch_and_creation
@@ -564,3 +568,71 @@ class Test01UserAPI:
             f'Проверьте, что PATCH-запрос к `{self.USERS_ME_URL}` с ключом '
             '`role` не изменяет роль пользователя.'
         )
+
+    def test_11_claims_token(self, admin, django_user_model):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_access_token(admin)}'
+        )
+        users_table = django_user_model._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/categories/')
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            users_table in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что GET-запрос с токеном, в claims которого есть '
+            'роль, не загружает пользователя из базы.'
+        )
+
+        def post_category(slug):
+            return client.post(
+                '/api/v1/categories/', data={'name': slug, 'slug': slug}
+            )
+
+        assert post_category('films').status_code == HTTPStatus.CREATED
+
+        django_user_model.objects.filter(pk=admin.pk).update(role='user')
+        assert post_category('books').status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что запрос на запись проверяет права по текущей '
+            'роли пользователя, а не по роли из токена.'
+        )
+        assert client.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), (
+            f'Проверьте, что GET-запрос к `{self.USERS_URL}` проверяет права '
+            'по текущей роли пользователя, а не по роли из токена.'
+        )
+
+        django_user_model.objects.filter(pk=admin.pk).update(
+            role='admin', is_active=False
+        )
+        assert post_category('music').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что неактивный пользователь не может выполнять '
+            'запросы на запись по ранее выданному токену.'
+        )
+        response = client.get(self.USERS_ME_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        assert client.get(self.USERS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что неактивный админ не может читать данные '
+            'пользователей по ранее выданному токену.'
+        )
+
+        admin.delete()
+        assert post_category('music').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что удалённый пользователь не может выполнять '
+            'запросы на запись по ранее выданному токену.'
+        )
+        assert client.get(self.USERS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что удалённый админ не может читать данные '
+            'пользователей по ранее выданному токену.'
+        )
@@ -3,8 +3,8 @@ from http import HTTPStatus
 import pytest
 
 from tests.utils import (
-    check_name_and_slug_patterns, check_pagination, check_permissions,
-    create_categories
+    check_cursor_pagination, check_name_and_slug_patterns, check_pagination,
+    check_permissions, create_categories
 )
 
 
@@ -153,3 +153,10 @@ class Test02CategoryAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, self.CATEGORY_URL, data,
                           'модератора', categories, HTTPStatus.FORBIDDEN)
+
+    def test_06_categories_cursor_pagination(self, client, admin_client):
+        categories = create_categories(admin_client)
+        check_cursor_pagination(
+            client, self.CATEGORY_URL,
+            [category['slug'] for category in categories], key='slug'
+        )
@@ -3,8 +3,8 @@ from http import HTTPStatus
 import pytest
 
 from tests.utils import (
-    check_name_and_slug_patterns, check_pagination, check_permissions,
-    create_genre
+    check_cursor_pagination, check_name_and_slug_patterns, check_pagination,
+    check_permissions, create_genre
 )
 
 
@@ -136,3 +136,10 @@ class Test03GenreAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, self.GENRES_URL, data,
                           'модератора', genres, HTTPStatus.FORBIDDEN)
+
+    def test_06_genres_cursor_pagination(self, client, admin_client):
+        genres = create_genre(admin_client)
+        check_cursor_pagination(
+            client, self.GENRES_URL,
+            [genre['slug'] for genre in genres], key='slug'
+        )
@@ -1,9 +1,17 @@
+import json
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from api.leaderboards import get_leaderboard_key
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from tests.utils import (
-    check_pagination, check_permissions, create_categories, create_genre,
+    check_cursor_pagination, check_fast_serializers, check_pagination,
+    check_permissions, create_categories, create_genre, create_single_review,
     create_titles
 )
 
@@ -353,3 +361,454 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_titles_list_query_count(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        for idx in range(8):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genres[0]['slug'], genres[1]['slug']],
+                'category': categories[idx % 2]['slug'],
+            })
+
+        query_counts = []
+        for limit in (1, 10):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{self.TITLES_URL}?limit={limit}')
+            assert len(response.json()['results']) == limit
+            query_counts.append(len(context.captured_queries))
+
+        assert query_counts[0] == query_counts[1], (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` выполняет '
+            'одинаковое число запросов к базе данных независимо от размера '
+            'страницы: категории и жанры произведений должны загружаться '
+            f'одним запросом. Сейчас: {query_counts}.'
+        )
+
+    def test_08_titles_full_text_search(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        for name, description in (
+            ('Ёжик в тумане', ''),
+            ('Сказка странствий', 'Путь через туманные горы'),
+            ('Туман', ''),
+        ):
+            admin_client.post(self.TITLES_URL, data={
+                'name': name,
+                'year': 1975,
+                'description': description,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            })
+
+        response = client.get(f'{self.TITLES_URL}?search=туман')
+        assert response.status_code == HTTPStatus.OK
+        names = {title['name'] for title in response.json()['results']}
+        assert names == {
+            'Ёжик в тумане', 'Сказка странствий', 'Туман'
+        }, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}?search=` ищет '
+            'произведения по началу слов в названии и описании. '
+            f'Сейчас найдены: {names}.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?search=ёжик тум')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Ёжик в тумане'], (
+            'Проверьте, что при поиске по нескольким словам возвращаются '
+            'только произведения, содержащие все слова. '
+            f'Сейчас найдены: {names}.'
+        )
+
+    def test_09_titles_autocomplete(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        ids = {}
+        for name in ('Ёжик в тумане', 'Ежевика', 'Старый ёж'):
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': name,
+                'year': 1975,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            })
+            ids[name] = response.json()['id']
+        url = f'{self.TITLES_URL}autocomplete/'
+
+        response = client.get(url, {'q': 'ЕЖ'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` доступен без авторизации.'
+        )
+        names = [title['name'] for title in response.json()]
+        assert names == ['Ежевика', 'Ёжик в тумане', 'Старый ёж'], (
+            f'Проверьте, что `{url}?q=` без учёта регистра и различия ё/е '
+            'возвращает сначала названия, начинающиеся с префикса, затем '
+            f'названия со словом, начинающимся с него. Сейчас: {names}.'
+        )
+
+        response = client.get(url, {'q': 'еж', 'limit': 1})
+        assert len(response.json()) == 1, (
+            f'Проверьте, что `{url}` учитывает параметр `limit`.'
+        )
+
+        admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=ids['Ежевика']),
+            data={'name': 'Малина'}
+        )
+        admin_client.delete(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=ids['Старый ёж'])
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'q': 'еж'})
+        names = [title['name'] for title in response.json()]
+        assert names == ['Ёжик в тумане'], (
+            'Проверьте, что подсказки обновляются при изменении и удалении '
+            f'произведений. Сейчас: {names}.'
+        )
+        assert not context.captured_queries, (
+            f'Проверьте, что `{url}` отвечает из индекса в памяти, не '
+            'обращаясь к базе данных.'
+        )
+
+    def test_10_titles_filter_by_several_genres(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        slugs = [genre['slug'] for genre in genres]
+        cases = (
+            (f'genre={slugs[0]},{slugs[1]}', [titles[0]['id']]),
+            (f'genre={slugs[0]},{slugs[2]}',
+             [titles[0]['id'], titles[1]['id']]),
+            (f'genre={slugs[0]},{slugs[1]}&genre_match=all',
+             [titles[0]['id']]),
+            (f'genre={slugs[0]},{slugs[2]}&genre_match=all', []),
+        )
+        for query, expected in cases:
+            response = client.get(f'{self.TITLES_URL}?{query}')
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            ids = [title['id'] for title in data['results']]
+            assert ids == expected and data['count'] == len(expected), (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}?{query}` '
+                'возвращает каждое подходящее произведение ровно один раз. '
+                f'Ожидались id {expected}, получены {ids}.'
+            )
+
+    def test_11_titles_range_filters_and_ordering(self, client, admin_client,
+                                                  user_client):
+        titles, categories, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Текст', 4)
+        create_single_review(user_client, titles[0]['id'], 'Текст', 6)
+        create_single_review(admin_client, titles[1]['id'], 'Текст', 9)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+        cases = (
+            ('year__gte=1985', [die_hard]),
+            ('year__lte=1985', [terminator]),
+            ('year__gte=1980&year__lte=1990', [terminator, die_hard]),
+            ('rating__gte=5', [terminator, die_hard]),
+            ('rating__gte=6', [die_hard]),
+            (f'category__in={categories[0]["slug"]},{categories[1]["slug"]}',
+             [terminator, die_hard]),
+            (f'category__in={categories[1]["slug"]}', [die_hard]),
+            ('ordering=-rating', [die_hard, terminator]),
+            ('ordering=-year', [die_hard, terminator]),
+        )
+        for query, expected in cases:
+            response = client.get(f'{self.TITLES_URL}?{query}')
+            assert response.status_code == HTTPStatus.OK
+            ids = [title['id'] for title in response.json()['results']]
+            assert ids == expected, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}?{query}` '
+                f'возвращает произведения с id {expected}. Сейчас: {ids}.'
+            )
+
+    def test_12_titles_top_and_trending(self, client, admin_client,
+                                        user_client, settings):
+        titles, categories, genres = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+        create_single_review(admin_client, terminator, 'Текст', 4)
+        create_single_review(user_client, terminator, 'Текст', 6)
+        create_single_review(admin_client, die_hard, 'Текст', 9)
+        cases = (
+            ('top/', [die_hard, terminator]),
+            (f'top/?category={categories[0]["slug"]}', [terminator]),
+            (f'top/?genre={genres[2]["slug"]}', [die_hard]),
+            ('top/?limit=1', [die_hard]),
+            ('trending/', [terminator, die_hard]),
+        )
+        for path, expected in cases:
+            response = client.get(f'{self.TITLES_URL}{path}')
+            assert response.status_code == HTTPStatus.OK, (
+                f'Эндпоинт `{self.TITLES_URL}{path}` не найден или '
+                'недоступен неавторизованному пользователю.'
+            )
+            ids = [title['id'] for title in response.json()]
+            assert ids == expected, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}{path}` '
+                f'возвращает произведения с id {expected}. Сейчас: {ids}.'
+            )
+        response = client.get(f'{self.TITLES_URL}trending/')
+        assert response.json()[0]['recent_reviews'] == 2, (
+            'Проверьте, что в ответе `trending/` указано число отзывов за '
+            'окно TRENDING_WINDOW_DAYS в поле `recent_reviews`.'
+        )
+
+        create_single_review(user_client, die_hard, 'Текст', 10)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{self.TITLES_URL}trending/')
+        ids = [title['id'] for title in response.json()]
+        queries = len(context.captured_queries)
+        assert ids == [terminator, die_hard] and not queries, (
+            'Проверьте, что `trending/` до пересчёта отдаётся из снимка '
+            'без запросов к базе данных.'
+        )
+
+        settings.LEADERBOARD_REFRESH_INTERVAL = 0
+        call_command('refresh_leaderboards', stdout=StringIO())
+        response = client.get(f'{self.TITLES_URL}trending/')
+        ids = [title['id'] for title in response.json()]
+        assert ids == [die_hard, terminator], (
+            'Проверьте, что команда `refresh_leaderboards` пересчитывает '
+            f'снимки. Сейчас: {ids}.'
+        )
+
+    def test_13_titles_bulk(self, client, admin_client, user_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'{self.TITLES_URL}bulk/'
+        # Заполняем кэш списка, чтобы проверить его сброс.
+        client.get(self.TITLES_URL)
+        items = [
+            {'name': 'Чужой', 'year': 1979, 'category': categories[0]['slug'],
+             'genre': [genres[0]['slug'], genres[2]['slug']]},
+            {'name': 'Нет жанра', 'year': 1979,
+             'category': categories[0]['slug'], 'genre': ['unknown']},
+            {'id': titles[1]['id'], 'name': 'Крепкий орешек 2',
+             'genre': [genres[0]['slug']]},
+            {'name': 'Без года', 'category': categories[0]['slug'],
+             'genre': [genres[0]['slug']]},
+        ]
+
+        response = user_client.post(url, data=items, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что POST-запрос к `{url}` доступен только '
+            'администратору.'
+        )
+
+        response = admin_client.post(
+            url, data=json.dumps(items), content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос администратора к `{url}` с '
+            'JSON-массивом возвращает ответ со статусом 200.'
+        )
+        results = response.json()
+        statuses = [result['status'] for result in results]
+        assert statuses == [201, 400, 200, 400], (
+            f'Проверьте, что `{url}` возвращает статус для каждого элемента. '
+            f'Сейчас: {results}.'
+        )
+        assert 'genre' in results[1]['errors']
+        assert 'year' in results[3]['errors']
+
+        response = client.get(self.TITLES_URL)
+        data = {title['id']: title for title in response.json()['results']}
+        created = data[results[0]['id']]
+        assert created['name'] == 'Чужой' and {
+            genre['slug'] for genre in created['genre']
+        } == {genres[0]['slug'], genres[2]['slug']}, (
+            'Проверьте, что пакетная загрузка создаёт произведения с жанрами '
+            'и сбрасывает кэш списка.'
+        )
+        updated = data[titles[1]['id']]
+        assert updated['name'] == 'Крепкий орешек 2' and [
+            genre['slug'] for genre in updated['genre']
+        ] == [genres[0]['slug']], (
+            'Проверьте, что элемент с `id` обновляет произведение и '
+            'заменяет его жанры.'
+        )
+
+        ndjson = '\n'.join(json.dumps({
+            'name': f'Сериал {idx}', 'year': 2000,
+            'category': categories[1]['slug'], 'genre': [genres[1]['slug']],
+        }) for idx in range(3))
+        response = admin_client.post(
+            url, data=ndjson, content_type='application/x-ndjson'
+        )
+        statuses = [result['status'] for result in response.json()]
+        assert statuses == [201] * 3, (
+            f'Проверьте, что `{url}` принимает NDJSON.'
+        )
+        response = client.get(
+            f'{self.TITLES_URL}autocomplete/', {'q': 'сериал'}
+        )
+        assert len(response.json()) == 3, (
+            'Проверьте, что произведения из пакетной загрузки попадают в '
+            'подсказки.'
+        )
+
+        items = [
+            {'id': titles[0]['id'], 'genre': [genres[0]['slug']]},
+            {'id': titles[0]['id'], 'genre': [genres[0]['slug']]},
+        ]
+        response = admin_client.post(url, data=items, format='json')
+        assert response.status_code == HTTPStatus.OK
+        statuses = [result['status'] for result in response.json()]
+        assert statuses == [200, 400], (
+            f'Проверьте, что `{url}` отклоняет повтор `id` в одном пакете. '
+            f'Сейчас: {response.json()}.'
+        )
+
+    def test_14_titles_fast_serializer(self, client, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Текст', 7)
+        check_fast_serializers(client, self.TITLES_URL, settings)
+
+    def test_15_titles_json_renderer(self, client, admin_client,
+                                     monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Текст', 7)
+        urls = (
+            self.TITLES_URL,
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
+        )
+        fast = [client.get(url).content for url in urls]
+        caches['api'].clear()
+        monkeypatch.setattr('api.renderers.orjson', None)
+        plain = [client.get(url).content for url in urls]
+        assert fast == plain, (
+            'Проверьте, что FastJSONRenderer выдаёт тот же JSON, что и '
+            'JSONRenderer из DRF.'
+        )
+
+    def test_16_titles_cursor_pagination(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        ids = [title['id'] for title in titles]
+        check_cursor_pagination(client, self.TITLES_URL, ids)
+        check_cursor_pagination(
+            client, f'{self.TITLES_URL}?ordering=-year', ids[::-1]
+        )
+
+    def test_17_titles_response_cache(self, client, admin_client,
+                                      user_client):
+        titles, categories, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+
+        def check_not_modified(url):
+            response = client.get(url)
+            etag = response.get('ETag')
+            assert response.status_code == HTTPStatus.OK and etag, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок ETag.'
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+                'If-None-Match возвращает ответ со статусом 304.'
+            )
+            assert response['ETag'] == etag
+            return etag
+
+        writes = (
+            ('изменения произведения', lambda: admin_client.patch(
+                detail_url, data={'name': 'Терминатор 2'}
+            )),
+            ('изменения жанров произведения', lambda: admin_client.patch(
+                detail_url, data={'genre': [genres[2]['slug']]}
+            )),
+            ('создания отзыва', lambda: create_single_review(
+                user_client, title_id, 'Текст', 3
+            )),
+            ('удаления жанра', lambda: admin_client.delete(
+                f'/api/v1/genres/{genres[2]["slug"]}/'
+            )),
+            ('удаления категории', lambda: admin_client.delete(
+                f'/api/v1/categories/{categories[0]["slug"]}/'
+            )),
+        )
+        for description, write in writes:
+            etags = {
+                url: check_not_modified(url)
+                for url in (self.TITLES_URL, detail_url)
+            }
+            write()
+            for url, etag in etags.items():
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                assert response.status_code == HTTPStatus.OK, (
+                    f'Проверьте, что после {description} GET-запрос к '
+                    f'`{url}` возвращает новые данные, а не закэшированный '
+                    'ответ.'
+                )
+                assert response['ETag'] != etag
+
+        etag = check_not_modified('/api/v1/categories/')
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+        )
+        response = client.get(
+            '/api/v1/categories/', HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'music' in [
+            category['slug'] for category in response.json()['results']
+        ], (
+            'Проверьте, что после создания категории GET-запрос к '
+            '`/api/v1/categories/` возвращает новые данные.'
+        )
+
+    def test_18_titles_cursor_with_nullable_ordering(self, client,
+                                                     admin_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[1]['id'], 'Текст', 7)
+        for ordering in ('rating', '-rating'):
+            url = (
+                f'{self.TITLES_URL}?pagination=cursor&limit=1'
+                f'&ordering={ordering}'
+            )
+            ids = []
+            for _ in titles:
+                response = client.get(url)
+                assert response.status_code == HTTPStatus.OK, (
+                    'Проверьте, что GET-запрос к '
+                    f'`{self.TITLES_URL}?pagination=cursor&ordering='
+                    f'{ordering}` и переход по ссылке `next` возвращают '
+                    'ответ со статусом 200.'
+                )
+                data = response.json()
+                ids.extend(title['id'] for title in data['results'])
+                url = data['next']
+                if not url:
+                    break
+            assert sorted(ids) == sorted(title['id'] for title in titles), (
+                'Проверьте, что при сортировке по рейтингу в режиме '
+                '`?pagination=cursor` на страницы попадают и произведения '
+                f'без рейтинга. Сейчас: {ids}.'
+            )
+
+    def test_19_titles_top_snapshots(self, client, admin_client, settings):
+        titles, categories, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Текст', 7)
+        cache = caches['api']
+        response = client.get(f'{self.TITLES_URL}top/?category=unknown')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == []
+        assert cache.get(
+            get_leaderboard_key('top', {'category': 'unknown'})
+        ) is None, (
+            'Проверьте, что для несуществующей категории снимок рейтинга '
+            'не сохраняется в кэш.'
+        )
+
+        key = get_leaderboard_key('top', {'category': categories[0]['slug']})
+        settings.LEADERBOARD_SNAPSHOT_TIMEOUT = 0
+        client.get(f'{self.TITLES_URL}top/?category={categories[0]["slug"]}')
+        assert cache.get(key) is None, (
+            'Проверьте, что снимки рейтинга хранятся в кэше не дольше '
+            'LEADERBOARD_SNAPSHOT_TIMEOUT секунд.'
+        )
+        settings.LEADERBOARD_SNAPSHOT_TIMEOUT = 3600
+        client.get(f'{self.TITLES_URL}top/?category={categories[0]["slug"]}')
+        assert cache.get(key)['rows'][0]['id'] == titles[0]['id']
+
+        stderr = StringIO()
+        call_command('refresh_leaderboards', stdout=StringIO(), stderr=stderr)
+        assert 'API_CACHE_BACKEND' in stderr.getvalue(), (
+            'Проверьте, что команда `refresh_leaderboards` предупреждает, '
+            'что с локальным кэшем снимки не видны веб-процессам.'
+        )
@@ -1,11 +1,20 @@
+import json
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from api import bulk
+from api.views import ReviewsViewSet
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import ModelSerializer
+from reviews.models import Review, Title
 
 from tests.utils import (
-    check_fields, check_pagination, create_reviews, create_single_review,
-    create_titles
+    check_fast_serializers, check_fields, check_pagination, create_reviews,
+    create_single_review, create_titles
 )
 
 
@@ -413,3 +422,365 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_title_score_histogram(self, admin_client, admin, user_client,
+                                      user, moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[1]['id']
+            ),
+            data={'score': 9}
+        )
+        moderator_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[2]['id']
+            )
+        )
+        create_single_review(admin_client, titles[1]['id'], 'Текст', 1)
+
+        response = admin_client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        data = response.json()
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected.update({'5': 1, '9': 1})
+        assert data.get('score_histogram') == expected, (
+            'Проверьте, что при создании, изменении и удалении отзывов '
+            'обновляется распределение оценок, а GET-запрос к '
+            f'`{self.TITLE_DETAIL_URL_TEMPLATE}` возвращает его в поле '
+            f'`score_histogram`. Сейчас: {data.get("score_histogram")}.'
+        )
+        # Средняя по всем отзывам (5 + 9 + 1) / 3 = 5 с весом 5.
+        assert data.get('weighted_rating') == pytest.approx(39 / 7), (
+            'Проверьте, что в поле `weighted_rating` возвращается '
+            'байесовский рейтинг произведения.'
+        )
+
+        fields = [f'score_{score}_count' for score in range(1, 11)]
+        counters = list(Title.objects.order_by('id').values_list(*fields))
+        Title.objects.update(**{field: 0 for field in fields})
+        call_command('rebuild_ratings', stdout=StringIO())
+        assert list(
+            Title.objects.order_by('id').values_list(*fields)
+        ) == counters, (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает '
+            'распределение оценок по таблице отзывов.'
+        )
+
+    def test_08_reviews_bulk(self, admin_client, admin, user_client, user,
+                             moderator, tmp_path, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, first, 'Уже есть', 2)
+        url = '/api/v1/reviews/bulk/'
+        items = [
+            {'title': first, 'author': admin.username, 'text': 'A',
+             'score': 10},
+            {'title': first, 'author': user.username, 'text': 'B',
+             'score': 1},
+            {'title': second, 'author': moderator.username, 'text': 'C',
+             'score': 7},
+            {'title': second, 'author': moderator.username, 'text': 'D',
+             'score': 3},
+            {'title': 0, 'author': 'nobody', 'text': 'E', 'score': 5},
+            {'title': second, 'author': admin.username, 'text': 'F',
+             'score': 11},
+        ]
+
+        response = user_client.post(url, data=items, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что POST-запрос к `{url}` доступен только '
+            'администратору.'
+        )
+        response = admin_client.post(url, data=items, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        statuses = [result['status'] for result in response.json()]
+        assert statuses == [201, 400, 201, 400, 400, 400], (
+            f'Проверьте, что `{url}` отклоняет повторные отзывы, отзывы на '
+            'несуществующие произведения и от несуществующих авторов и '
+            f'оценки вне диапазона. Сейчас: {response.json()}.'
+        )
+        ratings = dict(Title.objects.values_list('id', 'rating'))
+        assert ratings == {first: 6, second: 7}, (
+            'Проверьте, что после пакетного импорта пересчитываются '
+            f'рейтинги произведений. Сейчас: {ratings}.'
+        )
+
+        path = tmp_path / 'reviews.ndjson'
+        path.write_text('\n'.join(json.dumps(item) for item in (
+            {'title': second, 'author': admin.username, 'text': 'G',
+             'score': 1},
+            {'title': second, 'author': admin.username, 'text': 'H',
+             'score': 1},
+        )), encoding='utf-8')
+        stdout = StringIO()
+        call_command('import_reviews', str(path), stdout=stdout,
+                     stderr=StringIO())
+        assert 'Загружено отзывов: 1, с ошибками: 1' in stdout.getvalue()
+        assert Title.objects.get(pk=second).rating == 4, (
+            'Проверьте, что команда `import_reviews` загружает отзывы и '
+            'пересчитывает рейтинг.'
+        )
+
+        resolve_reviews = bulk.resolve_reviews
+
+        def resolve_then_race(valid, results):
+            # Параллельный запрос записывает отзыв после проверки пакета.
+            reviews = resolve_reviews(valid, results)
+            Review.objects.create(
+                title_id=first, author=moderator, text='Параллельный',
+                score=9
+            )
+            return reviews
+
+        monkeypatch.setattr(bulk, 'resolve_reviews', resolve_then_race)
+        response = admin_client.post(url, data=[
+            {'title': first, 'author': moderator.username, 'text': 'I',
+             'score': 2},
+        ], format='json')
+        statuses = [result['status'] for result in response.json()]
+        assert statuses == [400], (
+            f'Проверьте, что `{url}` не сообщает о создании отзыва, '
+            'пропущенного из-за параллельной записи. '
+            f'Сейчас: {response.json()}.'
+        )
+        assert Title.objects.get(pk=first).rating == 7
+
+        def resolve_then_same_race(valid, results):
+            # Параллельный отзыв совпадает с элементом пакета.
+            reviews = resolve_reviews(valid, results)
+            Review.objects.create(
+                title_id=second, author=user, text='J', score=2
+            )
+            return reviews
+
+        monkeypatch.setattr(bulk, 'resolve_reviews', resolve_then_same_race)
+        response = admin_client.post(url, data=[
+            {'title': second, 'author': user.username, 'text': 'J',
+             'score': 2},
+        ], format='json')
+        statuses = [result['status'] for result in response.json()]
+        assert statuses == [400], (
+            f'Проверьте, что `{url}` не сообщает о создании отзыва, '
+            'пропущенного из-за параллельной записи с тем же текстом '
+            f'и оценкой. Сейчас: {response.json()}.'
+        )
+
+    def test_09_review_post_queries(self, admin_client, user_client,
+                                    monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        for expected_status in (HTTPStatus.CREATED, HTTPStatus.BAD_REQUEST):
+            with CaptureQueriesContext(connection) as context:
+                response = user_client.post(
+                    url, data={'text': 'Текст', 'score': 5}
+                )
+            assert response.status_code == expected_status
+            selects = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+            ]
+            titles_read = [sql for sql in selects if 'reviews_title' in sql]
+            reviews_read = [sql for sql in selects if 'reviews_review' in sql]
+            assert len(titles_read) == 1 and not reviews_read, (
+                f'Проверьте, что POST-запрос к `{self.REVIEWS_URL_TEMPLATE}` '
+                'загружает произведение один раз, а повторный отзыв '
+                'отсекается ограничением unique_review, а не отдельным '
+                f'запросом. Сейчас: {selects}.'
+            )
+
+        def fail_foreign_key(serializer, validated_data):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(ModelSerializer, 'create', fail_foreign_key)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        with pytest.raises(IntegrityError):
+            user_client.post(url, data={'text': 'Текст', 'score': 5})
+
+    def test_10_reviews_fast_serializer(self, client, admin_client, admin,
+                                        user_client, user, settings):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        check_fast_serializers(
+            client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            settings,
+        )
+
+    def test_11_reviews_streaming(self, client, admin_client,
+                                  django_user_model, settings):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        for idx in range(7):
+            author = django_user_model.objects.create(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            title.reviews.create(
+                author=author, text=f'Отзыв {idx}', score=idx + 1
+            )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        for query in ('?limit=6', '?limit=6&offset=1',
+                      '?pagination=cursor&limit=6'):
+            settings.API_STREAMING_MIN_ROWS = 1000
+            response = client.get(url + query)
+            assert not response.streaming
+            settings.API_STREAMING_MIN_ROWS = 5
+            settings.API_STREAMING_CHUNK_SIZE = 4
+            streamed = client.get(url + query)
+            assert streamed.status_code == HTTPStatus.OK
+            assert streamed.streaming, (
+                f'Проверьте, что большая страница `{url}{query}` '
+                'отдаётся потоком.'
+            )
+            content = b''.join(streamed.streaming_content)
+            assert content == response.content, (
+                f'Проверьте, что потоковый ответ на `{url}{query}` совпадает '
+                'с обычным.'
+            )
+            assert json.loads(content)['results']
+
+    def test_12_title_rating_upkeep(self, admin_client, admin, user_client,
+                                    user, moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+
+        def get_rating():
+            return Title.objects.values_list(
+                'reviews_count', 'score_sum', 'rating'
+            ).get(pk=title_id)
+
+        assert get_rating() == (3, 15, 5.0), (
+            'Проверьте, что при создании отзыва обновляются рейтинг, '
+            'число отзывов и сумма оценок произведения.'
+        )
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[1]['id']
+            ),
+            data={'score': 8}
+        )
+        assert get_rating() == (3, 18, 6.0), (
+            'Проверьте, что при изменении оценки отзыва обновляется '
+            'рейтинг произведения.'
+        )
+
+        stale = Review.objects.get(pk=reviews[2]['id'])
+        moderator_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[2]['id']
+            )
+        )
+        assert get_rating() == (2, 13, 6.5), (
+            'Проверьте, что при удалении отзыва обновляется рейтинг '
+            'произведения.'
+        )
+        ReviewsViewSet().perform_destroy(stale)
+        assert get_rating() == (2, 13, 6.5), (
+            'Проверьте, что повторное удаление уже удалённого отзыва '
+            'не меняет рейтинг произведения.'
+        )
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert get_rating() == (1, 5, 5.0), (
+            'Проверьте, что после удаления пользователя рейтинги '
+            'произведений пересчитываются без его отзывов.'
+        )
+        response = admin_client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.json()['rating'] == 5
+
+    def test_13_reviews_conditional_get(self, client, admin_client, admin,
+                                        user_client, user, moderator_client,
+                                        moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+
+        def get_etag():
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert 'Last-Modified' not in response
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{self.REVIEWS_URL_TEMPLATE}` '
+                'с совпадающим If-None-Match возвращает ответ со статусом '
+                '304.'
+            )
+            return response['ETag']
+
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        writes = (
+            ('удаления не последнего отзыва', lambda: admin_client.delete(
+                self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                    title_id=title_id, review_id=reviews[0]['id']
+                )
+            )),
+            ('переименования произведения', lambda: admin_client.patch(
+                self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+                data={'name': 'Терминатор 2'}
+            )),
+            ('изменения отзыва', lambda: moderator_client.patch(
+                self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                    title_id=title_id, review_id=reviews[2]['id']
+                ),
+                data={'text': 'Новый текст отзыва'}
+            )),
+            ('переименования автора отзыва', lambda: admin_client.patch(
+                f'/api/v1/users/{user.username}/',
+                data={'username': 'renamed_user'}
+            )),
+        )
+        for description, write in writes:
+            etag = get_etag()
+            write()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после {description} GET-запрос к '
+                f'`{self.REVIEWS_URL_TEMPLATE}` со старым If-None-Match '
+                'возвращает ответ со статусом 200.'
+            )
+        assert {
+            review['title'] for review in response.json()['results']
+        } == {'Терминатор 2'}
+        assert 'renamed_user' in {
+            review['author'] for review in response.json()['results']
+        }
+
+        etag = get_etag()
+        reviews_table = Review._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert not any(
+            reviews_table in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что ETag списка отзывов строится по хранимым '
+            'полям произведения, без запросов к таблице отзывов.'
+        )
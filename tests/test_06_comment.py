@@ -1,8 +1,12 @@
 from http import HTTPStatus
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment
 
-from tests.utils import (check_fields, check_pagination, create_comments,
+from tests.utils import (check_cursor_pagination, check_fast_serializers,
+                         check_fields, check_pagination, create_comments,
                          create_reviews, create_single_comment)
 
 
@@ -366,3 +370,140 @@ class Test06CommentAPI:
             f'Проверьте, что PUT-запрос к `{self.COMMENT_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_08_comments_list_queries(self, client, admin_client, admin,
+                                      user_client, user, moderator_client,
+                                      moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        clients = list(author_map.values())
+        for idx in range(9):
+            create_single_comment(
+                clients[idx % 3], title_id, review_id, f'Комментарий {idx}'
+            )
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+
+        query_counts = []
+        for limit in (1, 9):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{url}?limit={limit}')
+            assert len(response.json()['results']) == limit
+            query_counts.append(len(context.captured_queries))
+        assert query_counts[0] == query_counts[1], (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'выполняет одинаковое число запросов к базе данных независимо '
+            f'от размера страницы. Сейчас: {query_counts}.'
+        )
+
+        wrong_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[1]['id'], review_id=review_id
+        )
+        response = client.get(wrong_url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'с отзывом другого произведения возвращает ответ со статусом 404.'
+        )
+        response = user_client.post(wrong_url, data={'text': 'Текст'})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что POST-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'с отзывом другого произведения возвращает ответ со статусом 404.'
+        )
+
+    def test_09_comments_fast_serializer(self, client, admin_client, admin,
+                                         user_client, user, settings):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        check_fast_serializers(client, self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        ), settings)
+
+    def test_10_comments_cursor_pagination(self, client, admin_client, admin,
+                                           user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        check_cursor_pagination(client, self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        ), [comment['id'] for comment in comments])
+
+    def test_11_comments_conditional_get(self, client, admin_client, admin,
+                                         user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(
+            admin_client, author_map
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'с совпадающим If-None-Match возвращает ответ со статусом 304.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            data={'text': 'Новый текст отзыва'}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения текста отзыва GET-запрос к '
+            f'`{self.COMMENTS_URL_TEMPLATE}` со старым If-None-Match '
+            'возвращает ответ со статусом 200.'
+        )
+        assert {
+            comment['review'] for comment in response.json()['results']
+        } == {'Новый текст отзыва'}
+
+        writes = (
+            ('изменения комментария', lambda: user_client.patch(
+                self.COMMENT_DETAIL_URL_TEMPLATE.format(
+                    title_id=title_id, review_id=review_id,
+                    comment_id=comments[1]['id']
+                ),
+                data={'text': 'Новый текст комментария'}
+            )),
+            ('удаления комментария', lambda: admin_client.delete(
+                self.COMMENT_DETAIL_URL_TEMPLATE.format(
+                    title_id=title_id, review_id=review_id,
+                    comment_id=comments[0]['id']
+                )
+            )),
+            ('переименования автора комментария', lambda: admin_client.patch(
+                f'/api/v1/users/{user.username}/',
+                data={'username': 'renamed_user'}
+            )),
+        )
+        for description, write in writes:
+            etag = client.get(url)['ETag']
+            write()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после {description} GET-запрос к '
+                f'`{self.COMMENTS_URL_TEMPLATE}` со старым If-None-Match '
+                'возвращает ответ со статусом 200.'
+            )
+        assert [
+            (comment['author'], comment['text'])
+            for comment in response.json()['results']
+        ] == [('renamed_user', 'Новый текст комментария')]
+
+        comments_table = Comment._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert not any(
+            comments_table in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что ETag списка комментариев строится по хранимым '
+            'полям отзыва, без запросов к таблице комментариев.'
+        )
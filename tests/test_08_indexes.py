@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Comment, Review, Title
+from reviews.search import full_text_search, get_search_backend
+
+
+@pytest.mark.django_db
+class Test08Indexes:
+
+    QUERIES = (
+        (
+            'comment_review_pub_date_idx',
+            lambda: Comment.objects.filter(review_id=1).order_by(
+                'pub_date', 'id'
+            ),
+        ),
+        (
+            'review_title_pub_date_idx',
+            lambda: Review.objects.filter(title_id=1).order_by(
+                'pub_date', 'id'
+            ),
+        ),
+        (
+            'title_year_idx',
+            lambda: Title.objects.filter(year=1984).order_by('id'),
+        ),
+        (
+            'title_category_idx',
+            lambda: Title.objects.filter(category_id=1).order_by('id'),
+        ),
+        (
+            'title_year_idx',
+            lambda: Title.objects.filter(
+                year__gte=1980, year__lte=1990
+            ).order_by('year', 'id'),
+        ),
+        (
+            'title_rating_idx',
+            lambda: Title.objects.filter(rating__gte=7).order_by(
+                '-rating', '-id'
+            ),
+        ),
+        (
+            'title_category_idx',
+            lambda: Title.objects.filter(
+                category__slug__in=('movie', 'book')
+            ).order_by('id'),
+        ),
+    )
+
+    @pytest.mark.parametrize('index_name,get_queryset', QUERIES)
+    def test_01_query_uses_index(self, index_name, get_queryset):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            pytest.skip('EXPLAIN проверяется только на SQLite и PostgreSQL.')
+        if connection.vendor == 'postgresql':
+            # На пустых таблицах планировщик предпочтёт Seq Scan.
+            # SET LOCAL действует до конца транзакции теста.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = get_queryset().explain()
+        assert index_name in plan, (
+            f'Проверьте, что для запроса используется индекс `{index_name}`.'
+            f' Сейчас план запроса: {plan}'
+        )
+
+    def test_02_search_index_skips_counter_updates(self):
+        if get_search_backend(connection) != 'fts5':
+            pytest.skip('Триггеры поискового индекса есть только у FTS5.')
+        title = Title.objects.create(name='Туман', year=1975)
+        titles = Title.objects.filter(pk=title.pk)
+
+        def count_changes(update):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT total_changes()')
+                before = cursor.fetchone()[0]
+                update()
+                cursor.execute('SELECT total_changes()')
+                return cursor.fetchone()[0] - before
+
+        changes = count_changes(
+            lambda: titles.update(rating=7.0, reviews_count=1, score_sum=7)
+        )
+        assert changes == 1, (
+            'Проверьте, что обновление рейтинга и счётчиков произведения '
+            'не перезаписывает строку полнотекстового индекса. '
+            f'Сейчас изменено строк: {changes}.'
+        )
+        assert count_changes(lambda: titles.update(name='Ёжик')) > 1
+        assert list(full_text_search(Title.objects.all(), ['ёжик'])) == [
+            title
+        ], (
+            'Проверьте, что после изменения названия произведение '
+            'находится поиском по новому названию.'
+        )
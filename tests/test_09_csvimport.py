@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from reviews.management.commands.csvimport import Checkpoint
+from reviews.models import Comment, Review, Title, User
+
+CSV_DATA = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,reader,reader@yamdb.fake,user,,,\n'
+        '101,critic,critic@yamdb.fake,moderator,,,\n'
+    ),
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n',
+    'titles.csv': (
+        'id,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,Крестный отец,1972,1\n'
+    ),
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,2,1\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Отзыв,100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Отзыв,101,6,2019-09-25T10:00:00.000Z\n'
+        '3,2,Отзыв,100,8,2019-10-01T12:30:00.000Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Комментарий,101,2020-01-13T23:20:02.422Z\n'
+    ),
+}
+
+
+def write_csv_files(path, data=CSV_DATA):
+    for name, content in data.items():
+        (path / name).write_text(content, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CsvImport:
+
+    def test_01_csvimport(self, tmp_path):
+        call_command(
+            'csvimport', '--path', write_csv_files(tmp_path),
+            '--chunk-size', '2', stdout=StringIO()
+        )
+        assert User.objects.count() == 2
+        assert Title.objects.get(pk=1).genre.count() == 1
+        assert Review.objects.get(pk=1).pub_date == datetime(
+            2019, 9, 24, 21, 8, 21, 567000, tzinfo=timezone.utc
+        ), (
+            'Проверьте, что команда `csvimport` сохраняет `pub_date` '
+            'отзывов из CSV, а не время загрузки.'
+        )
+        assert Comment.objects.get(pk=1).pub_date == datetime(
+            2020, 1, 13, 23, 20, 2, 422000, tzinfo=timezone.utc
+        ), (
+            'Проверьте, что команда `csvimport` сохраняет `pub_date` '
+            'комментариев из CSV.'
+        )
+        assert Review.objects.get(pk=1).updated is not None
+        ratings = dict(Title.objects.values_list('id', 'rating'))
+        assert ratings == {1: 8, 2: 8}, (
+            'Проверьте, что после загрузки пересчитываются рейтинги. '
+            f'Сейчас: {ratings}.'
+        )
+
+    def test_02_csvimport_resume_from_checkpoint(self, tmp_path,
+                                                 monkeypatch):
+        data_path = tmp_path / 'data'
+        data_path.mkdir()
+        write_csv_files(data_path)
+        checkpoint = tmp_path / 'checkpoint.json'
+        options = (
+            'csvimport', '--path', str(data_path), '--chunk-size', '2',
+            '--checkpoint', str(checkpoint),
+        )
+        save = Checkpoint.save
+
+        def save_then_crash(self, csv_file, rows, done=False):
+            # Пачка уже закоммичена, но в контрольную точку не попала.
+            if csv_file == 'review.csv' and not done:
+                raise RuntimeError('Загрузка прервана')
+            save(self, csv_file, rows, done)
+
+        monkeypatch.setattr(Checkpoint, 'save', save_then_crash)
+        with pytest.raises(CommandError, match='review.csv'):
+            call_command(*options, stdout=StringIO())
+        assert Review.objects.count() == 2
+        assert checkpoint.exists(), (
+            'Проверьте, что при ошибке загрузки контрольная точка '
+            'сохраняется.'
+        )
+
+        monkeypatch.setattr(Checkpoint, 'save', save)
+        stdout = StringIO()
+        call_command(*options, stdout=stdout)
+        assert 'users.csv' not in stdout.getvalue(), (
+            'Проверьте, что при возобновлении загруженные файлы '
+            'пропускаются.'
+        )
+        assert Review.objects.count() == 3 and Comment.objects.count() == 1, (
+            'Проверьте, что загрузка возобновляется с контрольной точки, '
+            'даже если последняя пачка была закоммичена, но не записана '
+            'в контрольную точку.'
+        )
+        assert not checkpoint.exists()
+        ratings = dict(Title.objects.values_list('id', 'rating'))
+        assert ratings == {1: 8, 2: 8}
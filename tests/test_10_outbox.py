@@ -0,0 +1,112 @@
+import smtplib
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from reviews import outbox
+from reviews.models import OutgoingEmail
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class ConnectionFailedBackend(BaseEmailBackend):
+    """Почтовый сервер недоступен."""
+
+    def open(self):
+        raise ConnectionRefusedError('SMTP недоступен')
+
+    def send_messages(self, email_messages):
+        raise AssertionError('Соединение не открыто')
+
+
+class SendFailedBackend(BaseEmailBackend):
+    """Сервер отклоняет каждое письмо."""
+
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPRecipientsRefused({})
+
+
+def create_emails(count):
+    return OutgoingEmail.objects.bulk_create(
+        OutgoingEmail(subject='Код', body=f'Письмо {idx}',
+                      recipient=f'user{idx}@yamdb.fake')
+        for idx in range(count)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Outbox:
+
+    def test_01_claim_batch(self, settings):
+        create_emails(3)
+        first = outbox.claim_batch(2)
+        second = outbox.claim_batch(2)
+        assert len(first) == 2 and len(second) == 1, (
+            'Проверьте, что claim_batch берёт не больше batch_size писем '
+            'и не отдаёт уже взятые письма.'
+        )
+        assert not {email.pk for email in first} & {
+            email.pk for email in second
+        }
+        assert outbox.claim_batch(2) == []
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 0
+        assert len(outbox.claim_batch(5)) == 3, (
+            'Проверьте, что после EMAIL_OUTBOX_RETRY_DELAY неотправленные '
+            'письма снова доступны.'
+        )
+
+    def test_02_deliver_pending(self, settings):
+        settings.EMAIL_BACKEND = LOCMEM_BACKEND
+        create_emails(5)
+        assert outbox.deliver_pending(batch_size=2) == 5
+        assert len(mail.outbox) == 5
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+        assert outbox.deliver_pending() == 0
+
+    @pytest.mark.parametrize(
+        'backend', (ConnectionFailedBackend, SendFailedBackend)
+    )
+    def test_03_deliver_pending_failing_backend(self, settings, backend):
+        settings.EMAIL_BACKEND = f'{__name__}.{backend.__name__}'
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 0
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+        create_emails(2)
+        for _ in range(5):
+            assert outbox.deliver_pending() == 0
+        attempts = set(OutgoingEmail.objects.values_list(
+            'attempts', flat=True
+        ))
+        assert attempts == {3}, (
+            'Проверьте, что неудачная отправка, в том числе ошибка '
+            'соединения с сервером, считается попыткой, а после '
+            'EMAIL_OUTBOX_MAX_ATTEMPTS письмо больше не берётся. '
+            f'Сейчас попыток: {attempts}.'
+        )
+
+    def test_04_signup_with_mail_server_down(self, client, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.ConnectionFailedBackend'
+        response = client.post('/api/v1/auth/signup/', data={
+            'email': 'valid@yamdb.fake', 'username': 'valid_username'
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что регистрация не падает, если почтовый сервер '
+            'недоступен: письмо остаётся в очереди.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None and email.attempts == 1
+
+    def test_05_dispatch_in_worker_pool(self, settings, monkeypatch):
+        settings.EMAIL_BACKEND = LOCMEM_BACKEND
+        settings.EMAIL_OUTBOX_WORKERS = 1
+        monkeypatch.setattr(outbox, '_executor', None)
+        create_emails(3)
+        outbox.dispatch()
+        # Пул из одного потока: пустая задача выполнится после рассылки.
+        outbox.get_executor().submit(lambda: None).result(timeout=10)
+        outbox.get_executor().shutdown()
+        assert len(mail.outbox) == 3, (
+            'Проверьте, что при EMAIL_OUTBOX_WORKERS > 0 письма '
+            'отправляются фоновым пулом.'
+        )
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
@@ -1,5 +1,7 @@
 from http import HTTPStatus
 
+from django.core.cache import caches
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +307,61 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def check_fast_serializers(client, url, settings):
+    responses = []
+    for fast in (False, True):
+        settings.API_FAST_SERIALIZERS = fast
+        caches['api'].clear()
+        responses.append(client.get(url))
+    slow, fast = responses
+    assert slow.status_code == fast.status_code == HTTPStatus.OK
+    assert slow.content == fast.content, (
+        f'Проверьте, что ответ на GET-запрос к `{url}` при '
+        '`API_FAST_SERIALIZERS = True` совпадает с ответом обычных '
+        'сериализаторов байт в байт.'
+    )
+
+
+def check_cursor_pagination(client, url, expected, key='id'):
+    """Обходит список в режиме ?pagination=cursor по одному объекту
+    и сравнивает значения key с expected (в ожидаемом порядке)."""
+
+    url += '&' if '?' in url else '?'
+    response = client.get(f'{url}pagination=cursor&limit=1')
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}pagination=cursor` '
+        'возвращает ответ со статусом 200.'
+    )
+    data = response.json()
+    assert data['count'] is None, (
+        f'Проверьте, что в режиме `pagination=cursor` для `{url}` общее '
+        'число объектов без параметра `count` не считается.'
+    )
+    assert data['previous'] is None
+    collected = []
+    pages = 0
+    while True:
+        pages += 1
+        collected.extend(item[key] for item in data['results'])
+        if not data['next'] or pages > len(expected):
+            break
+        data = client.get(data['next']).json()
+        assert data['previous'], (
+            f'Проверьте, что страницы `{url}pagination=cursor` после первой '
+            'содержат ссылку `previous`.'
+        )
+    assert collected == expected, (
+        f'Проверьте, что при обходе `{url}pagination=cursor` по ссылкам '
+        '`next` возвращаются все объекты по одному разу и по порядку. '
+        f'Сейчас: {collected}.'
+    )
+    for mode in ('exact', 'estimate'):
+        data = client.get(
+            f'{url}pagination=cursor&limit=1&count={mode}'
+        ).json()
+        assert data['count'] == len(expected), (
+            f'Проверьте, что `{url}pagination=cursor&count={mode}` '
+            'возвращает в ключе `count` число объектов.'
+        )